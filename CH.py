@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+"""
+@description: 收缩层次/Contraction Hierarchies
+@file_name: CH.py
+@project: Algorithm
+@version: 1.0
+@date: 2026/10/18 11:05
+@author: Air
+"""
+
+__author__ = 'Air'
+
+from array import array
+from collections import defaultdict
+import heapq
+import pickle
+from typing import Dict, List, Tuple
+
+from SP import Graph
+
+
+class ContractionHierarchy:
+    def __init__(self, g: Graph, witness_limit: int = 64) -> None:
+        """
+        预处理: 按优先级依次收缩顶点并添加捷径边, 之后的查询只需在向上的图中做双向搜索
+        :param g: 加权有向图(边权非负)
+        :param witness_limit: 见证搜索最多确定的顶点数, 越小预处理越快, 捷径边越多
+        """
+        self.V = g.V
+        self.witness_limit = witness_limit
+        # 收缩过程中的完整图(含捷径边), 重边取最小权重
+        self.out = defaultdict(dict)
+        self.inn = defaultdict(dict)
+        for v, w, weight in g.iter_edges():
+            if v != w and weight < self.out[v].get(w, float('inf')):
+                self.out[v][w] = weight
+                self.inn[w][v] = weight
+        # 捷径边 (u, w) 经过的中间顶点
+        self.middle = {}
+        self.contracted = [False] * self.V
+        # 与已收缩顶点相邻的次数, 使收缩在图中均匀分布
+        self.deleted = [0] * self.V
+        self.rank = array('i', [0]) * self.V
+        self.__contract_all()
+        self.__build_search_graphs()
+        self.settled = 0
+
+    def __priority(self, v: int) -> int:
+        """
+        收缩优先级: 边差(新增捷径数 - 删除边数) + 已收缩的相邻顶点数
+        :param v: 顶点
+        :return: 优先级, 越小越先收缩
+        """
+        removed = sum(1 for u in self.inn[v] if not self.contracted[u]) + \
+            sum(1 for w in self.out[v] if not self.contracted[w])
+        return len(self.__shortcuts(v)) - removed + self.deleted[v]
+
+    def __shortcuts(self, v: int) -> List[Tuple[int, int, float]]:
+        """
+        收缩 v需要添加的捷径边: u -> v -> w 没有不经过 v且不更长的见证路径时才需要
+        :param v: 顶点
+        :return: (起点, 终点, 权重) 的列表
+        """
+        contracted = self.contracted
+        targets = [(w, weight) for w, weight in self.out[v].items() if not contracted[w]]
+        if not targets:
+            return []
+        result = []
+        for u, in_weight in self.inn[v].items():
+            if contracted[u]:
+                continue
+            limit = in_weight + max(weight for _, weight in targets)
+            distances = self.__witness(u, v, limit)
+            for w, out_weight in targets:
+                if w != u and in_weight + out_weight < distances.get(w, float('inf')):
+                    result.append((u, w, in_weight + out_weight))
+        return result
+
+    def __witness(self, source: int, skip: int, limit: float) -> Dict[int, float]:
+        """
+        在未收缩的顶点中做有限的 Dijkstra, 跳过将被收缩的顶点
+        :param source: 起点
+        :param skip: 跳过的顶点
+        :param limit: 距离上限
+        :return: 已找到的距离
+        """
+        contracted = self.contracted
+        distances = {source: 0.0}
+        pq = [(0.0, source)]
+        settled = 0
+        while pq and settled < self.witness_limit:
+            current_distance, current_vertex = heapq.heappop(pq)
+            if current_distance > distances[current_vertex]:
+                continue
+            if current_distance > limit:
+                break
+            settled += 1
+            for neighbor, weight in self.out[current_vertex].items():
+                if neighbor == skip or contracted[neighbor]:
+                    continue
+                distance = current_distance + weight
+                if distance < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = distance
+                    heapq.heappush(pq, (distance, neighbor))
+        return distances
+
+    def __contract_all(self) -> None:
+        """
+        按优先级惰性更新的顺序收缩所有顶点
+        :return:
+        """
+        pq = [(self.__priority(v), v) for v in range(self.V)]
+        heapq.heapify(pq)
+        rank = 0
+        while pq:
+            _, v = heapq.heappop(pq)
+            # 惰性更新: 重新计算后若不再最小则放回
+            priority = self.__priority(v)
+            if pq and priority > pq[0][0]:
+                heapq.heappush(pq, (priority, v))
+                continue
+            for u, w, weight in self.__shortcuts(v):
+                if weight < self.out[u].get(w, float('inf')):
+                    self.out[u][w] = weight
+                    self.inn[w][u] = weight
+                    self.middle[(u, w)] = v
+            self.contracted[v] = True
+            self.rank[v] = rank
+            rank += 1
+            for x in self.out[v]:
+                self.deleted[x] += 1
+            for x in self.inn[v]:
+                self.deleted[x] += 1
+
+    def __build_search_graphs(self) -> None:
+        """
+        按 rank拆分为两张 CSR图: up 为向 rank更高顶点的出边, down 为来自 rank更高顶点的入边(反向存储)
+        中间顶点与边对齐存储, 原始边为 -1
+        :return:
+        """
+        up, down = defaultdict(list), defaultdict(list)
+        for u, row in self.out.items():
+            for w, weight in row.items():
+                mid = self.middle.get((u, w), -1)
+                if self.rank[w] > self.rank[u]:
+                    up[u].append((w, weight, mid))
+                else:
+                    down[w].append((u, weight, mid))
+        self.up = self.__pack(up)
+        self.down = self.__pack(down)
+        del self.out, self.inn, self.middle, self.contracted, self.deleted
+
+    def __pack(self, rows: Dict[int, List[Tuple[int, float, int]]]) -> Tuple[array, array, array, array]:
+        """
+        打包为 CSR数组
+        :param rows: 每个顶点的 (邻点, 权重, 中间顶点) 列表
+        :return: (offsets, targets, weights, middles)
+        """
+        offsets = array('q', [0]) * (self.V + 1)
+        targets, weights, middles = array('i'), array('d'), array('i')
+        for v in range(self.V):
+            for w, weight, mid in rows.get(v, ()):
+                targets.append(w)
+                weights.append(weight)
+                middles.append(mid)
+            offsets[v + 1] = len(targets)
+        return offsets, targets, weights, middles
+
+    def save(self, file_name: str) -> None:
+        """
+        保存预处理结果
+        :param file_name: 文件名
+        :return:
+        """
+        with open(file_name, 'wb') as fl:
+            pickle.dump((self.V, self.rank, self.up, self.down), fl, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, file_name: str) -> 'ContractionHierarchy':
+        """
+        读取预处理结果
+        :param file_name: 文件名
+        :return: 收缩层次
+        """
+        ch = cls.__new__(cls)
+        with open(file_name, 'rb') as fl:
+            ch.V, ch.rank, ch.up, ch.down = pickle.load(fl)
+        ch.settled = 0
+        return ch
+
+    def query(self, source: int, target: int) -> Tuple[float, List[int]]:
+        """
+        点对点查询: 由起点沿 up图、由终点沿 down图同时向上搜索, 在 rank最高处相遇
+        :param source: 起点
+        :param target: 终点
+        :return: (最短距离, 原图中的路径), 不可达时为 (inf, [])
+        """
+        inf = float('inf')
+        searches = [(self.up, {source: 0.0}, {source: -1}, [(0.0, source)]),
+                    (self.down, {target: 0.0}, {target: -1}, [(0.0, target)])]
+        best, meet = (0.0, source) if source == target else (inf, -1)
+        self.settled = 0
+        side = 0
+        while searches[0][3] or searches[1][3]:
+            # 交替扩展, 一侧堆顶已不小于当前最优值时该侧停止
+            (offsets, targets, weights, _), dist, pred, pq = searches[side]
+            other = searches[1 - side][1]
+            side = 1 - side
+            if not pq:
+                continue
+            current_distance, current_vertex = heapq.heappop(pq)
+            if current_distance >= best:
+                pq.clear()
+                continue
+            if current_distance > dist[current_vertex]:
+                continue
+            self.settled += 1
+            if current_vertex in other and current_distance + other[current_vertex] < best:
+                best, meet = current_distance + other[current_vertex], current_vertex
+            for i in range(offsets[current_vertex], offsets[current_vertex + 1]):
+                neighbor, distance = targets[i], current_distance + weights[i]
+                if distance < dist.get(neighbor, inf):
+                    dist[neighbor] = distance
+                    pred[neighbor] = current_vertex
+                    heapq.heappush(pq, (distance, neighbor))
+        if meet == -1:
+            return inf, []
+        # 两侧路径拼接后展开捷径边
+        forward, backward = searches[0][2], searches[1][2]
+        hops = [meet]
+        while forward[hops[-1]] != -1:
+            hops.append(forward[hops[-1]])
+        hops.reverse()
+        while backward[hops[-1]] != -1:
+            hops.append(backward[hops[-1]])
+        path = [source]
+        for u, w in zip(hops, hops[1:]):
+            self.__unpack(u, w, path)
+        return best, path
+
+    def __unpack(self, u: int, w: int, path: List[int]) -> None:
+        """
+        把边 u -> w 展开为原图中的路径, 追加除 u以外的顶点
+        :param u: 起点
+        :param w: 终点
+        :param path: 路径
+        :return:
+        """
+        stack = [(u, w)]
+        while stack:
+            u, w = stack.pop()
+            mid = self.__middle(u, w)
+            if mid == -1:
+                path.append(w)
+            else:
+                stack.append((mid, w))
+                stack.append((u, mid))
+
+    def __middle(self, u: int, w: int) -> int:
+        """
+        查找边 u -> w 的中间顶点
+        :param u: 起点
+        :param w: 终点
+        :return: 中间顶点, 原始边为 -1
+        """
+        if self.rank[w] > self.rank[u]:
+            offsets, targets, _, middles = self.up
+            v, x = u, w
+        else:
+            offsets, targets, _, middles = self.down
+            v, x = w, u
+        for i in range(offsets[v], offsets[v + 1]):
+            if targets[i] == x:
+                return middles[i]
+        raise KeyError((u, w))
+
+
+if __name__ == '__main__':
+    import os
+    import random
+    import tempfile
+    import time
+
+    from GraphIO import read_edges
+
+    g = Graph.from_edges(*read_edges('tinyEWD.txt'))
+    ch = ContractionHierarchy(g)
+    print(ch.query(0, 6))
+    print(g.shortest_path(0, 6))
+
+    # 网格路网: 预处理、保存读取及与 dijkstra的对比
+    rnd = random.Random(0)
+    side = 60
+    g = Graph(side * side)
+    for r in range(side):
+        for c in range(side):
+            v = r * side + c
+            if c + 1 < side:
+                weight = rnd.uniform(1, 10)
+                g.add_edge(v, v + 1, weight)
+                g.add_edge(v + 1, v, weight)
+            if r + 1 < side:
+                weight = rnd.uniform(1, 10)
+                g.add_edge(v, v + side, weight)
+                g.add_edge(v + side, v, weight)
+    start = time.perf_counter()
+    ch = ContractionHierarchy(g)
+    elapsed = time.perf_counter() - start
+    # 网格图有 2 * side * (side - 1) 条无向边, 在 up/down 中共出现 4 * side * (side - 1) 次
+    shortcuts = len(ch.up[1]) + len(ch.down[1]) - 4 * side * (side - 1)
+    print(f'preprocessing: {elapsed:.3f}s, shortcuts: {shortcuts}')
+    with tempfile.TemporaryDirectory() as directory:
+        name = os.path.join(directory, 'grid.ch')
+        ch.save(name)
+        ch = ContractionHierarchy.load(name)
+    pairs = [(rnd.randrange(g.V), rnd.randrange(g.V)) for _ in range(200)]
+    start = time.perf_counter()
+    results = [ch.query(s, t)[0] for s, t in pairs]
+    print(f'ch query: {(time.perf_counter() - start) / len(pairs) * 1000:.3f}ms')
+    start = time.perf_counter()
+    expected = [g.dijkstra(s)[t] for s, t in pairs]
+    print(f'dijkstra: {(time.perf_counter() - start) / len(pairs) * 1000:.3f}ms')
+    print(all(abs(a - b) < 1e-9 for a, b in zip(results, expected)))
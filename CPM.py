@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+"""
+@description: 关键路径/Critical Path Method
+@file_name: CPM.py
+@project: Algorithm
+@version: 1.0
+@date: 2026/10/18 14:20
+@author: Air
+"""
+
+__author__ = 'Air'
+
+from array import array
+import heapq
+from typing import List, Sequence
+
+from GraphIO import read_jobs
+from SP import Graph
+
+
+class CriticalPathScheduler:
+    def __init__(self, durations: Sequence[float], successors: Sequence[Sequence[int]]) -> None:
+        """
+        并行任务调度: 每个任务只能在其所有前驱任务完成后开始
+        :param durations: 各任务耗时
+        :param successors: 各任务的后继任务
+        """
+        self.n = n = len(durations)
+        self.duration = array('d', durations)
+        self.succ = [list(row) for row in successors]
+        self.pred = [[] for _ in range(n)]
+        vs, ws = array('i'), array('i')
+        for j, row in enumerate(self.succ):
+            for k in row:
+                self.pred[k].append(j)
+                vs.append(j)
+                ws.append(k)
+        g = Graph.from_edges(n, vs, ws, array('d', [0.0]) * len(vs), frozen=True)
+        g.topological_sort()
+        self.order = g.order
+        self.position = array('i', [0]) * n
+        for i, j in enumerate(self.order):
+            self.position[j] = i
+        if any(self.position[j] >= self.position[k] for j, k in zip(vs, ws)):
+            raise ValueError('precedence constraints contain a cycle')
+        # start: 最早开始时间; tail: 由任务开始到全部完成的最长耗时(含自身)
+        self.start = array('d', [0.0]) * n
+        self.tail = array('d', [0.0]) * n
+        for j in self.order:
+            self.start[j] = self.__earliest_start(j)
+        for j in reversed(self.order):
+            self.tail[j] = self.__tail(j)
+        # 耗时被修改、剩余耗时尚待向前传播的任务
+        self.dirty = set()
+        # 完成时间的最大堆(惰性删除), 堆顶即总工期
+        self.finishes = [(-self.finish_time(j), j) for j in range(n)]
+        heapq.heapify(self.finishes)
+
+    @classmethod
+    def from_file(cls, file_name: str) -> 'CriticalPathScheduler':
+        """
+        由任务文件(josPC格式)构建
+        :param file_name: 文件名
+        :return: 调度器
+        """
+        return cls(*read_jobs(file_name))
+
+    def __earliest_start(self, j: int) -> float:
+        """
+        由前驱的完成时间计算最早开始时间
+        :param j: 任务
+        :return: 所有前驱完成时间的最大值, 没有前驱时为 0
+        """
+        return max((self.start[i] + self.duration[i] for i in self.pred[j]), default=0.0)
+
+    def __tail(self, j: int) -> float:
+        """
+        由后继的剩余耗时计算剩余耗时
+        :param j: 任务
+        :return: 自身耗时加上后继剩余耗时的最大值
+        """
+        return self.duration[j] + max((self.tail[k] for k in self.succ[j]), default=0.0)
+
+    def __push_finish(self, j: int) -> None:
+        """
+        记录任务的新完成时间, 过期记录多于任务数时重建堆, 使堆的大小不超过 2n
+        :param j: 任务
+        :return:
+        """
+        heapq.heappush(self.finishes, (-self.finish_time(j), j))
+        if len(self.finishes) > 2 * self.n:
+            self.finishes = [(-self.finish_time(k), k) for k in range(self.n)]
+            heapq.heapify(self.finishes)
+
+    def start_time(self, j: int) -> float:
+        """
+        最早开始时间
+        :param j: 任务
+        :return: 开始时间
+        """
+        return self.start[j]
+
+    def finish_time(self, j: int) -> float:
+        """
+        最早完成时间
+        :param j: 任务
+        :return: 完成时间
+        """
+        return self.start[j] + self.duration[j]
+
+    def makespan(self) -> float:
+        """
+        总工期
+        :return: 全部任务的完成时间
+        """
+        finishes = self.finishes
+        while finishes and -finishes[0][0] != self.finish_time(finishes[0][1]):
+            heapq.heappop(finishes)
+        return -finishes[0][0] if finishes else 0.0
+
+    def slack(self, j: int) -> float:
+        """
+        松弛时间: 不延误总工期的前提下任务可推迟的时间
+        :param j: 任务
+        :return: 松弛时间, 关键任务为 0
+        """
+        self.__propagate_tails()
+        return max(0.0, self.makespan() - self.tail[j] - self.start[j])
+
+    def critical_path(self) -> List[int]:
+        """
+        关键路径: 由剩余耗时最长的起始任务出发, 每次走向剩余耗时最长的后继
+        :return: 关键路径上的任务
+        """
+        if not self.n:
+            return []
+        self.__propagate_tails()
+        j = max((j for j in range(self.n) if not self.pred[j]), key=self.tail.__getitem__)
+        path = [j]
+        while self.succ[j]:
+            j = max(self.succ[j], key=self.tail.__getitem__)
+            path.append(j)
+        return path
+
+    def set_duration(self, j: int, duration: float) -> None:
+        """
+        修改任务耗时, 只向后更新开始时间发生变化的后继
+        剩余耗时延迟到查询松弛时间或关键路径时批量向前传播
+        :param j: 任务
+        :param duration: 新的耗时
+        :return:
+        """
+        self.duration[j] = duration
+        self.__push_finish(j)
+        # 按拓扑序向后传播开始时间
+        pq = [(self.position[k], k) for k in set(self.succ[j])]
+        heapq.heapify(pq)
+        queued = {k for _, k in pq}
+        while pq:
+            _, k = heapq.heappop(pq)
+            queued.discard(k)
+            start = self.__earliest_start(k)
+            if start == self.start[k]:
+                continue
+            self.start[k] = start
+            self.__push_finish(k)
+            for x in self.succ[k]:
+                if x not in queued:
+                    queued.add(x)
+                    heapq.heappush(pq, (self.position[x], x))
+        self.dirty.add(j)
+
+    def __propagate_tails(self) -> None:
+        """
+        按逆拓扑序向前传播被修改任务的剩余耗时, 只更新发生变化的前驱
+        :return:
+        """
+        pq = [(-self.position[j], j) for j in self.dirty]
+        heapq.heapify(pq)
+        queued = self.dirty
+        self.dirty = set()
+        while pq:
+            _, k = heapq.heappop(pq)
+            queued.discard(k)
+            tail = self.__tail(k)
+            if tail == self.tail[k]:
+                continue
+            self.tail[k] = tail
+            for x in self.pred[k]:
+                if x not in queued:
+                    queued.add(x)
+                    heapq.heappush(pq, (-self.position[x], x))
+
+
+if __name__ == '__main__':
+    import random
+    import time
+
+    scheduler = CriticalPathScheduler.from_file('josPC.txt')
+    print("Start times:")
+    for k in range(scheduler.n):
+        print(f'{k}: {scheduler.start_time(k)} slack {scheduler.slack(k)}')
+    print("Finish time:")
+    print(scheduler.makespan())
+    print(scheduler.critical_path())
+    scheduler.set_duration(2, 60.0)
+    print(scheduler.makespan(), scheduler.critical_path())
+
+    # 大规模流水线: 增量更新与完全重算对比
+    rnd = random.Random(0)
+    n = 200000
+    durations = [rnd.uniform(1, 10) for _ in range(n)]
+    successors = [[k for k in (j + rnd.randint(1, 50), j + rnd.randint(1, 1000)) if k < n] for j in range(n)]
+    start = time.perf_counter()
+    scheduler = CriticalPathScheduler(durations, successors)
+    print(f'build: {time.perf_counter() - start:.3f}s, makespan {scheduler.makespan():.1f}')
+    start = time.perf_counter()
+    for _ in range(100):
+        scheduler.set_duration(rnd.randrange(n - 1000, n), rnd.uniform(1, 10))
+    print(f'100 updates: {time.perf_counter() - start:.3f}s, makespan {scheduler.makespan():.1f}')
+    start = time.perf_counter()
+    path = scheduler.critical_path()
+    print(f'critical path of {len(path)} tasks: {time.perf_counter() - start:.3f}s')
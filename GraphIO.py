@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+"""
+@description: 图文件读取/Graph IO
+@file_name: GraphIO.py
+@project: Algorithm
+@version: 1.0
+@date: 2026/10/18 10:12
+@author: Air
+"""
+
+__author__ = 'Air'
+
+from array import array
+from itertools import islice
+import mmap
+import os
+import struct
+import tempfile
+from typing import BinaryIO, Iterator, List, Sequence, Tuple
+
+# 二进制缓存文件头: 魔数, 顶点数, 边数; 之后依次为 E个 int32起点, E个 int32终点, E个 float64权重(本机字节序)
+MAGIC = b'EWG1'
+HEADER = struct.Struct('<4sqq')
+# 每次读取的字节数
+BUFFER_SIZE = 1 << 22
+
+
+def read_header(fl: BinaryIO) -> Tuple[int, int]:
+    """
+    读取边文件的文件头, 首行为 "V E"(tinyEWG) 或首行为 V、次行为 E(tinyEWD)
+    :param fl: 以二进制模式打开的文件
+    :return: (顶点数, 边数)
+    """
+    header = fl.readline().split()
+    vertices = int(header[0])
+    edges = int(header[1]) if len(header) > 1 else int(fl.readline())
+    return vertices, edges
+
+
+def edge_chunks(fl: BinaryIO, chunk_edges: int) -> Iterator[Tuple[array, array, array]]:
+    """
+    在文件头之后按块流式读取边, 每块至多 chunk_edges条
+    :param fl: 已读过文件头的二进制文件
+    :param chunk_edges: 每块的边数
+    :return: (起点数组, 终点数组, 权重数组) 的迭代器
+    """
+    while True:
+        tokens = b' '.join(islice(fl, chunk_edges)).split()
+        if not tokens:
+            return
+        yield array('i', map(int, tokens[0::3])), array('i', map(int, tokens[1::3])), \
+            array('d', map(float, tokens[2::3]))
+
+
+def parse_edges(file_name: str) -> Tuple[int, array, array, array]:
+    """
+    流式解析边文件, 首行为 "V E"(tinyEWG) 或首行为 V、次行为 E(tinyEWD), 之后每行为 "v w weight"
+    :param file_name: 文件名
+    :return: (顶点数, 起点数组, 终点数组, 权重数组)
+    """
+    vs, ws, weights = array('i'), array('i'), array('d')
+    with open(file_name, 'rb') as fl:
+        vertices, edges = read_header(fl)
+        while True:
+            lines = fl.readlines(BUFFER_SIZE)
+            if not lines:
+                break
+            tokens = b' '.join(lines).split()
+            vs.extend(map(int, tokens[0::3]))
+            ws.extend(map(int, tokens[1::3]))
+            weights.extend(map(float, tokens[2::3]))
+    if len(vs) != edges or len(weights) != edges:
+        raise ValueError(f'{file_name}: expected {edges} edges, got {len(weights)}')
+    return vertices, vs, ws, weights
+
+
+def write_cache(file_name: str, vertices: int, vs: Sequence[int], ws: Sequence[int],
+                weights: Sequence[float]) -> None:
+    """
+    写入二进制缓存文件: 先写同目录下的临时文件再原子替换, 并发的读者不会映射到写了一半的文件
+    :param file_name: 缓存文件名
+    :param vertices: 顶点数
+    :param vs: 起点数组
+    :param ws: 终点数组
+    :param weights: 权重数组
+    :return:
+    """
+    fd, tmp_name = tempfile.mkstemp(prefix=os.path.basename(file_name) + '.', suffix='.tmp',
+                                    dir=os.path.dirname(file_name) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as fl:
+            fl.write(HEADER.pack(MAGIC, vertices, len(vs)))
+            array('i', vs).tofile(fl)
+            array('i', ws).tofile(fl)
+            array('d', weights).tofile(fl)
+        os.replace(tmp_name, file_name)
+    except BaseException:
+        os.remove(tmp_name)
+        raise
+
+
+def load_cache(file_name: str) -> Tuple[int, memoryview, memoryview, memoryview]:
+    """
+    内存映射二进制缓存文件, 不复制数据
+    :param file_name: 缓存文件名
+    :return: (顶点数, 起点视图, 终点视图, 权重视图)
+    """
+    with open(file_name, 'rb') as fl:
+        mm = mmap.mmap(fl.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, vertices, edges = HEADER.unpack_from(mm)
+    if magic != MAGIC or len(mm) != HEADER.size + edges * 16:
+        raise ValueError(f'{file_name}: not a graph cache file')
+    view = memoryview(mm)
+    offset = HEADER.size
+    vs = view[offset:offset + edges * 4].cast('i')
+    offset += edges * 4
+    ws = view[offset:offset + edges * 4].cast('i')
+    offset += edges * 4
+    weights = view[offset:offset + edges * 8].cast('d')
+    return vertices, vs, ws, weights
+
+
+def read_edges(file_name: str, cache: bool = True) -> Tuple[int, Sequence[int], Sequence[int], Sequence[float]]:
+    """
+    读取边文件, 若存在比源文件新的缓存文件 file_name + '.bin' 则直接内存映射
+    :param file_name: 文件名
+    :param cache: 是否使用及生成缓存文件, 缓存文件写入失败(如只读目录)时忽略
+    :return: (顶点数, 起点, 终点, 权重)
+    """
+    sidecar = file_name + '.bin'
+    if cache and os.path.exists(sidecar) and os.path.getmtime(sidecar) >= os.path.getmtime(file_name):
+        try:
+            return load_cache(sidecar)
+        except ValueError:
+            pass
+    vertices, vs, ws, weights = parse_edges(file_name)
+    if cache:
+        try:
+            write_cache(sidecar, vertices, vs, ws, weights)
+        except OSError:
+            pass
+    return vertices, vs, ws, weights
+
+
+def read_jobs(file_name: str) -> Tuple[List[float], List[List[int]]]:
+    """
+    读取并行任务调度文件(josPC), 首行为任务数, 之后每行为 "耗时 后继任务..."
+    :param file_name: 文件名
+    :return: (各任务耗时, 各任务的后继任务)
+    """
+    durations, successors = [], []
+    with open(file_name, 'rb') as fl:
+        n = int(fl.readline())
+        for line in fl:
+            tokens = line.split()
+            if not tokens:
+                continue
+            durations.append(float(tokens[0]))
+            successors.append([int(token) for token in tokens[1:]])
+    if len(durations) != n:
+        raise ValueError(f'{file_name}: expected {n} jobs, got {len(durations)}')
+    return durations, successors
+
+
+if __name__ == '__main__':
+    import random
+    import tempfile
+    import time
+
+    print(read_edges('tinyEWD.txt', cache=False))
+    print(read_edges('tinyEWG.txt', cache=False))
+    print(read_jobs('josPC.txt'))
+
+    # 文本解析与内存映射缓存对比
+    rnd = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        name = os.path.join(directory, 'random.txt')
+        with open(name, 'w', encoding='utf-8') as f:
+            f.write('100000\n1000000\n')
+            for _ in range(1000000):
+                f.write(f'{rnd.randrange(100000)} {rnd.randrange(100000)} {rnd.random():.5f}\n')
+        for _ in range(2):
+            start = time.perf_counter()
+            data = read_edges(name)
+            print(f'{type(data[1]).__name__}: {time.perf_counter() - start:.3f}s')
+        del data
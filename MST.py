@@ -12,15 +12,34 @@
 
 __author__ = 'Air'
 
+from array import array
 import collections
-from queue import PriorityQueue
+import heapq
+from itertools import islice
+from multiprocessing import Pool
+import os
+import struct
+import tempfile
 
-from typing import List
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from GraphIO import edge_chunks, read_header
 from UF import UF
 
+# 外存 Kruskal顺串中的记录: 权重, 较小顶点, 较大顶点
+RUN_RECORD = struct.Struct('<dii')
+# 外存 Kruskal每次归并同时打开的顺串数上限, 远低于常见的 ulimit -n 1024
+MERGE_FAN_IN = 128
+
 
 class Edge:
+    __slots__ = ('v', 'w', 'weight')
+
     def __init__(self, v: int, w: int, weight: float) -> None:
         """
         带权边
@@ -70,36 +89,207 @@ class EdgeWeightedGraph:
         self.adj[e.w].append(Edge(e.w, e.v, e.weight))
         self.E += 1
 
-    def edges(self) -> List[Edge]:
+    @classmethod
+    def from_edges(cls, v: int, vs: Sequence[int], ws: Sequence[int],
+                   weights: Sequence[float]) -> 'EdgeWeightedGraph':
+        """
+        由边的数组批量构建图, 可直接接收 GraphIO.read_edges 的结果
+        :param v: 顶点数
+        :param vs: 一端顶点
+        :param ws: 另一端顶点
+        :param weights: 权重
+        :return: 加权无向图
+        """
+        g = cls(v)
+        for p, q, weight in zip(vs, ws, weights):
+            g.add_edge(Edge(p, q, weight))
+        return g
+
+    def adjacent(self, v: int) -> Iterator[Tuple[int, float]]:
+        """
+        v的所有邻边
+        :param v: 顶点
+        :return: (另一个顶点, 权重) 的迭代器
+        """
+        for e in self.adj[v]:
+            yield e.w, e.weight
+
+    def edges(self) -> Iterator[Edge]:
         """
-        返回加权无向图中的所有边
-        :return: 边的列表
+        惰性遍历加权无向图中的所有边
+        :return: 边的迭代器
         """
-        result = []
         for v in range(self.V):
             for e in self.adj[v]:
                 if e.w > v:
-                    result.append(e)
-        return result
+                    yield e
+
+
+class CompactEdgeWeightedGraph:
+    def __init__(self, v: int) -> None:
+        """
+        紧凑的加权无向图: 每条边只在三个平行数组中存一次, 邻接表保存边的下标
+        与 EdgeWeightedGraph接口相同, 可直接用于各最小生成树算法
+        :param v: 顶点数
+        :return:
+        """
+        self.V = v
+        self.E = 0
+        self.vs, self.ws, self.weights = array('i'), array('i'), array('d')
+        self.incident = [array('i') for _ in range(v)]
+
+    def add_edge(self, e: Edge) -> None:
+        """
+        增加一条边
+        :param e: 边
+        :return:
+        """
+        self.vs.append(e.v)
+        self.ws.append(e.w)
+        self.weights.append(e.weight)
+        self.incident[e.v].append(self.E)
+        self.incident[e.w].append(self.E)
+        self.E += 1
+
+    @classmethod
+    def from_edges(cls, v: int, vs: Sequence[int], ws: Sequence[int],
+                   weights: Sequence[float]) -> 'CompactEdgeWeightedGraph':
+        """
+        由边的数组批量构建图, 可直接接收 GraphIO.read_edges 的结果
+        :param v: 顶点数
+        :param vs: 一端顶点
+        :param ws: 另一端顶点
+        :param weights: 权重
+        :return: 加权无向图
+        """
+        g = cls(v)
+        g.vs, g.ws, g.weights = array('i', vs), array('i', ws), array('d', weights)
+        g.E = len(g.weights)
+        incident = g.incident
+        for i in range(g.E):
+            incident[g.vs[i]].append(i)
+            incident[g.ws[i]].append(i)
+        return g
+
+    def adjacent(self, v: int) -> Iterator[Tuple[int, float]]:
+        """
+        v的所有邻边
+        :param v: 顶点
+        :return: (另一个顶点, 权重) 的迭代器
+        """
+        vs, ws, weights = self.vs, self.ws, self.weights
+        for i in self.incident[v]:
+            yield (ws[i] if vs[i] == v else vs[i]), weights[i]
+
+    def edges(self) -> Iterator[Edge]:
+        """
+        惰性遍历加权无向图中的所有边, 与 EdgeWeightedGraph相同: 较小顶点在前, 不含自环
+        :return: 边的迭代器
+        """
+        vs, ws, weights = self.vs, self.ws, self.weights
+        for i in range(self.E):
+            v, w = vs[i], ws[i]
+            if v < w:
+                yield Edge(v, w, weights[i])
+            elif w < v:
+                yield Edge(w, v, weights[i])
+
+
+class IndexMinPQ:
+    def __init__(self, n: int) -> None:
+        """
+        索引最小优先队列, 索引为 0 ~ n-1, 支持减小键值
+        :param n: 容量
+        """
+        self.n = 0
+        # pq: 堆中位置(从 1开始) -> 索引; qp: 索引 -> 堆中位置, -1 表示不在队列中
+        self.pq = [0] * (n + 1)
+        self.qp = [-1] * n
+        self.keys = [None] * n
+
+    def is_empty(self) -> bool:
+        return self.n == 0
+
+    def contains(self, i: int) -> bool:
+        return self.qp[i] != -1
+
+    def insert(self, i: int, key: float) -> None:
+        """
+        插入索引及其键值
+        :param i: 索引
+        :param key: 键值
+        :return:
+        """
+        self.n += 1
+        self.qp[i] = self.n
+        self.pq[self.n] = i
+        self.keys[i] = key
+        self.__swim(self.n)
+
+    def decrease_key(self, i: int, key: float) -> None:
+        """
+        减小索引的键值
+        :param i: 索引
+        :param key: 新的键值
+        :return:
+        """
+        self.keys[i] = key
+        self.__swim(self.qp[i])
+
+    def del_min(self) -> int:
+        """
+        删除并返回键值最小的索引
+        :return: 索引
+        """
+        i = self.pq[1]
+        self.__exchange(1, self.n)
+        self.n -= 1
+        self.__sink(1)
+        self.qp[i] = -1
+        self.keys[i] = None
+        return i
+
+    def __greater(self, i: int, j: int) -> bool:
+        return self.keys[self.pq[i]] > self.keys[self.pq[j]]
+
+    def __exchange(self, i: int, j: int) -> None:
+        pq, qp = self.pq, self.qp
+        pq[i], pq[j] = pq[j], pq[i]
+        qp[pq[i]] = i
+        qp[pq[j]] = j
+
+    def __swim(self, k: int) -> None:
+        while k > 1 and self.__greater(k >> 1, k):
+            self.__exchange(k, k >> 1)
+            k >>= 1
+
+    def __sink(self, k: int) -> None:
+        while (k << 1) <= self.n:
+            j = k << 1
+            if j < self.n and self.__greater(j, j + 1):
+                j += 1
+            if not self.__greater(k, j):
+                break
+            self.__exchange(k, j)
+            k = j
 
 
 class LazyPrimMST:
     def __init__(self, g: EdgeWeightedGraph) -> None:
         """
         初始化延时 Prim算法类
+        优先队列为 heapq上的 (权重, 顶点, 顶点) 元组, 不加锁也不调用 Edge.__lt__
         :param g: 加权无向图
         """
-        self.pq = PriorityQueue()
+        self.pq = []
         self.marked = [False] * g.V
         self.mst = []
         self.visit(g, 0)
-        while not self.pq.empty():
-            e = self.pq.get()
-            v = e.v
-            w = e.w
+        while self.pq:
+            weight, v, w = heapq.heappop(self.pq)
             if self.marked[v] and self.marked[w]:
                 continue
-            self.mst.append(e)
+            self.mst.append(Edge(v, w, weight))
             if not self.marked[v]:
                 self.visit(g, v)
             if not self.marked[w]:
@@ -113,9 +303,73 @@ class LazyPrimMST:
         :return:
         """
         self.marked[v] = True
-        for e in g.adj[v]:
-            if not self.marked[e.w]:
-                self.pq.put(e)
+        for w, weight in g.adjacent(v):
+            if not self.marked[w]:
+                heapq.heappush(self.pq, (weight, v, w))
+
+    def edges(self) -> List[Edge]:
+        """
+        返回最小生成树
+        :return: 最小生成树
+        """
+        return self.mst
+
+    def weight(self) -> float:
+        """
+        计算最小生成树的权重和
+        :return: 最小生成树的权重和
+        """
+        return sum(e.weight for e in self.mst)
+
+
+class EagerPrimMST:
+    def __init__(self, g: EdgeWeightedGraph) -> None:
+        """
+        初始化即时 Prim算法类: 索引优先队列中每个非树顶点只保留到树的最短边, 队列大小为 O(V)
+        图不连通时得到最小生成森林
+        :param g: 加权无向图
+        """
+        self.edge_to = [None] * g.V
+        self.dist_to = [float('inf')] * g.V
+        self.marked = [False] * g.V
+        self.pq = IndexMinPQ(g.V)
+        self.mst = []
+        for v in range(g.V):
+            if not self.marked[v]:
+                self.prim(g, v)
+
+    def prim(self, g: EdgeWeightedGraph, s: int) -> None:
+        """
+        由 s开始生长一棵树
+        :param g: 加权无向图
+        :param s: 起点
+        :return:
+        """
+        self.dist_to[s] = 0.0
+        self.pq.insert(s, 0.0)
+        while not self.pq.is_empty():
+            v = self.pq.del_min()
+            if self.edge_to[v] is not None:
+                self.mst.append(self.edge_to[v])
+            self.visit(g, v)
+
+    def visit(self, g: EdgeWeightedGraph, v: int) -> None:
+        """
+        将 v加入树中并更新非树顶点到树的最短边
+        :param g: 加权无向图
+        :param v: 访问顶点
+        :return:
+        """
+        self.marked[v] = True
+        for w, weight in g.adjacent(v):
+            if self.marked[w] or weight >= self.dist_to[w]:
+                continue
+            self.edge_to[w] = Edge(v, w, weight)
+            self.dist_to[w] = weight
+            if self.pq.contains(w):
+                self.pq.decrease_key(w, weight)
+            else:
+                self.pq.insert(w, weight)
 
     def edges(self) -> List[Edge]:
         """
@@ -135,18 +389,16 @@ class LazyPrimMST:
 class KruskalMST:
     def __init__(self, g: EdgeWeightedGraph) -> None:
         self.mst = []
-        self.pq = PriorityQueue()
-        for e in g.edges():
-            self.pq.put(e)
+        # (权重, 顶点, 顶点) 元组一次性建堆 O(E)
+        self.pq = [(e.weight, e.v, e.w) for e in g.edges()]
+        heapq.heapify(self.pq)
         uf = UF(g.V)
-        while not self.pq.empty() and len(self.mst) < g.V - 1:
-            e = self.pq.get()
-            v = e.v
-            w = e.w
+        while self.pq and len(self.mst) < g.V - 1:
+            weight, v, w = heapq.heappop(self.pq)
             if uf.connected(v, w):
                 continue
             uf.union(v, w)
-            self.mst.append(e)
+            self.mst.append(Edge(v, w, weight))
 
     def edges(self) -> List[Edge]:
         return self.mst
@@ -155,21 +407,638 @@ class KruskalMST:
         return sum(e.weight for e in self.mst)
 
 
+class ArrayKruskalMST:
+    def __init__(self, v: int, vs: Sequence[int], ws: Sequence[int], weights: Sequence[float]) -> None:
+        """
+        列存储的 Kruskal: 边以三个平行数组给出(可直接接收 GraphIO.read_edges 的结果)
+        按权重一次性排序下标(有 NumPy时使用 argsort), 并查集为扁平整数数组, 路径减半 + 按大小合并
+        权重相同的边按下标先后处理
+        :param v: 顶点数
+        :param vs: 一端顶点
+        :param ws: 另一端顶点
+        :param weights: 权重
+        """
+        self.vs, self.ws, self.weights = vs, ws, weights
+        if np is not None:
+            order = np.argsort(np.asarray(weights, dtype=np.float64), kind='stable').astype(np.int64)
+            # 下标留在连续的 8字节数组中, 不展开为 Python int列表
+            order = array('q', order.tobytes())
+        else:
+            order = sorted(range(len(weights)), key=weights.__getitem__)
+        parent = array('i', range(v))
+        size = array('i', [1]) * v
+        # 最小生成树中的边在输入数组中的下标
+        self.index = array('i')
+        remaining = v - 1
+        for i in order:
+            if remaining <= 0:
+                break
+            p = vs[i]
+            while parent[p] != p:
+                parent[p] = parent[parent[p]]
+                p = parent[p]
+            q = ws[i]
+            while parent[q] != q:
+                parent[q] = parent[parent[q]]
+                q = parent[q]
+            if p == q:
+                continue
+            if size[p] < size[q]:
+                p, q = q, p
+            parent[q] = p
+            size[p] += size[q]
+            self.index.append(i)
+            remaining -= 1
+
+    def edges(self) -> List[Edge]:
+        return [Edge(self.vs[i], self.ws[i], self.weights[i]) for i in self.index]
+
+    def weight(self) -> float:
+        return sum(self.weights[i] for i in self.index)
+
+
+class BoruvkaMST:
+    def __init__(self, g: EdgeWeightedGraph, processes: int = 1) -> None:
+        """
+        Borůvka算法: 每轮为每个分量找到最轻的出边并全部加入, 用并查集收缩分量, 至多 O(logV)轮
+        每轮的扫描按边分块交给子进程, 边按 (权重, 较小顶点, 较大顶点) 全序比较, 结果与 KruskalMST一致
+        :param g: 加权无向图
+        :param processes: 进程数, 为 1时在当前进程中计算
+        """
+        self.vs, self.ws, self.weights = array('i'), array('i'), array('d')
+        for e in g.edges():
+            self.vs.append(e.v)
+            self.ws.append(e.w)
+            self.weights.append(e.weight)
+        columns = (self.vs, self.ws, self.weights)
+        m = len(self.weights)
+        size = max(1, -(-m // processes))
+        ranges = [(lo, min(lo + size, m)) for lo in range(0, m, size)]
+        pool = Pool(processes, initializer=_init_boruvka_worker, initargs=(columns,)) if processes > 1 else None
+        uf = UF(g.V)
+        index = []
+        try:
+            while True:
+                labels = array('i', (uf.find(v) for v in range(g.V)))
+                if pool is None:
+                    parts = [_cheapest_edges(columns, labels, lo, hi) for lo, hi in ranges]
+                else:
+                    parts = pool.map(_cheapest_edges_worker, [(labels, lo, hi) for lo, hi in ranges])
+                cheapest = {}
+                for part in parts:
+                    for c, i in part.items():
+                        if c not in cheapest or _edge_key(columns, i) < _edge_key(columns, cheapest[c]):
+                            cheapest[c] = i
+                added = False
+                for i in cheapest.values():
+                    if not uf.connected(self.vs[i], self.ws[i]):
+                        uf.union(self.vs[i], self.ws[i])
+                        index.append(i)
+                        added = True
+                if not added:
+                    break
+        finally:
+            if pool is not None:
+                pool.terminate()
+        index.sort(key=lambda i: _edge_key(columns, i))
+        self.mst = [Edge(self.vs[i], self.ws[i], self.weights[i]) for i in index]
+
+    def edges(self) -> List[Edge]:
+        return self.mst
+
+    def weight(self) -> float:
+        return sum(e.weight for e in self.mst)
+
+
+def _edge_key(columns: Tuple[Sequence[int], Sequence[int], Sequence[float]], i: int) -> Tuple[float, int, int]:
+    """
+    边的全序: 权重, 较小顶点, 较大顶点
+    :param columns: (顶点, 顶点, 权重) 列
+    :param i: 边的下标
+    :return: 比较键
+    """
+    return columns[2][i], columns[0][i], columns[1][i]
+
+
+def _cheapest_edges(columns: Tuple[Sequence[int], Sequence[int], Sequence[float]], labels: Sequence[int],
+                    lo: int, hi: int) -> Dict[int, int]:
+    """
+    在下标 [lo, hi) 的边中为每个分量找到最轻的出边
+    :param columns: (顶点, 顶点, 权重) 列
+    :param labels: 每个顶点所在分量
+    :param lo: 起始下标
+    :param hi: 结束下标
+    :return: 分量 -> 边的下标
+    """
+    vs, ws, weights = columns
+    best = {}
+    for i in range(lo, hi):
+        p, q = labels[vs[i]], labels[ws[i]]
+        if p == q:
+            continue
+        key = (weights[i], vs[i], ws[i])
+        for c in (p, q):
+            j = best.get(c)
+            if j is None or key < (weights[j], vs[j], ws[j]):
+                best[c] = i
+    return best
+
+
+class LinkCutTree:
+    def __init__(self) -> None:
+        """
+        Link-Cut树(伸展树实现), 维护森林中路径上权值最大的结点, 各操作均摊 O(logN)
+        结点编号从 1开始, 0为空结点
+        """
+        self.left, self.right, self.parent = [0], [0], [0]
+        self.rev = [False]
+        self.value = [float('-inf')]
+        # 子树(伸展树)中权值最大的结点
+        self.best = [0]
+
+    def add_node(self, value: float) -> int:
+        """
+        新增一个孤立结点
+        :param value: 权值
+        :return: 结点编号
+        """
+        self.left.append(0)
+        self.right.append(0)
+        self.parent.append(0)
+        self.rev.append(False)
+        self.value.append(value)
+        self.best.append(len(self.value) - 1)
+        return len(self.value) - 1
+
+    def reset_node(self, x: int, value: float) -> None:
+        """
+        重置一个已断开的结点以便复用
+        :param x: 结点
+        :param value: 权值
+        :return:
+        """
+        self.left[x] = self.right[x] = self.parent[x] = 0
+        self.rev[x] = False
+        self.value[x] = value
+        self.best[x] = x
+
+    def set_value(self, x: int, value: float) -> None:
+        """
+        修改结点权值
+        :param x: 结点
+        :param value: 权值
+        :return:
+        """
+        self.access(x)
+        self.value[x] = value
+        self.__pushup(x)
+
+    def __is_root(self, x: int) -> bool:
+        p = self.parent[x]
+        return p == 0 or (self.left[p] != x and self.right[p] != x)
+
+    def __pushup(self, x: int) -> None:
+        best = x
+        for c in (self.left[x], self.right[x]):
+            if c and self.value[self.best[c]] > self.value[best]:
+                best = self.best[c]
+        self.best[x] = best
+
+    def __reverse(self, x: int) -> None:
+        if x:
+            self.left[x], self.right[x] = self.right[x], self.left[x]
+            self.rev[x] = not self.rev[x]
+
+    def __pushdown(self, x: int) -> None:
+        if self.rev[x]:
+            self.__reverse(self.left[x])
+            self.__reverse(self.right[x])
+            self.rev[x] = False
+
+    def __rotate(self, x: int) -> None:
+        left, right, parent = self.left, self.right, self.parent
+        y = parent[x]
+        z = parent[y]
+        if not self.__is_root(y):
+            if left[z] == y:
+                left[z] = x
+            else:
+                right[z] = x
+        if left[y] == x:
+            left[y] = right[x]
+            if right[x]:
+                parent[right[x]] = y
+            right[x] = y
+        else:
+            right[y] = left[x]
+            if left[x]:
+                parent[left[x]] = y
+            left[x] = y
+        parent[y] = x
+        parent[x] = z
+        self.__pushup(y)
+        self.__pushup(x)
+
+    def __splay(self, x: int) -> None:
+        # 自顶向下下传翻转标记
+        stack = [x]
+        y = x
+        while not self.__is_root(y):
+            y = self.parent[y]
+            stack.append(y)
+        while stack:
+            self.__pushdown(stack.pop())
+        while not self.__is_root(x):
+            y = self.parent[x]
+            if not self.__is_root(y):
+                z = self.parent[y]
+                if (self.left[z] == y) == (self.left[y] == x):
+                    self.__rotate(y)
+                else:
+                    self.__rotate(x)
+            self.__rotate(x)
+
+    def access(self, x: int) -> None:
+        """
+        使根到 x的路径成为一条偏好路径, 并把 x伸展到其伸展树的根
+        :param x: 结点
+        :return:
+        """
+        last, y = 0, x
+        while y:
+            self.__splay(y)
+            self.right[y] = last
+            self.__pushup(y)
+            last, y = y, self.parent[y]
+        self.__splay(x)
+
+    def make_root(self, x: int) -> None:
+        self.access(x)
+        self.__reverse(x)
+
+    def find_root(self, x: int) -> int:
+        self.access(x)
+        while True:
+            self.__pushdown(x)
+            if not self.left[x]:
+                break
+            x = self.left[x]
+        self.__splay(x)
+        return x
+
+    def connected(self, x: int, y: int) -> bool:
+        return self.find_root(x) == self.find_root(y)
+
+    def link(self, x: int, y: int) -> None:
+        """
+        连接两棵树中的 x和 y
+        :param x: 结点
+        :param y: 结点
+        :return:
+        """
+        self.make_root(x)
+        self.parent[x] = y
+
+    def cut(self, x: int, y: int) -> None:
+        """
+        断开相邻的 x和 y
+        :param x: 结点
+        :param y: 结点
+        :return:
+        """
+        self.make_root(x)
+        self.access(y)
+        self.left[y] = 0
+        self.parent[x] = 0
+        self.__pushup(y)
+
+    def path_max(self, x: int, y: int) -> int:
+        """
+        x到 y路径上权值最大的结点
+        :param x: 结点
+        :param y: 结点
+        :return: 结点
+        """
+        self.make_root(x)
+        self.access(y)
+        return self.best[y]
+
+
+class DynamicMST:
+    def __init__(self, g: EdgeWeightedGraph, mst=None) -> None:
+        """
+        动态最小生成树: 以已有的最小生成树(默认 KruskalMST)为初值, 支持插入边和减小边权, 每次更新均摊 O(logV)
+        树边作为 Link-Cut树中的结点, 新边形成的环上最重的树边比新边重时被替换
+        :param g: 加权无向图
+        :param mst: 已有的最小生成树, 需提供 edges()
+        """
+        self.V = g.V
+        self.lct = LinkCutTree()
+        for _ in range(g.V):
+            self.lct.add_node(float('-inf'))
+        # 树边结点 -> 边, (较小顶点, 较大顶点) -> 树边结点
+        self.tree = {}
+        self.pair = {}
+        self.free = []
+        for e in (mst if mst is not None else KruskalMST(g)).edges():
+            self.__link(e)
+
+    def __link(self, e: Edge) -> None:
+        if self.free:
+            z = self.free.pop()
+            self.lct.reset_node(z, e.weight)
+        else:
+            z = self.lct.add_node(e.weight)
+        self.lct.link(e.v + 1, z)
+        self.lct.link(z, e.w + 1)
+        self.tree[z] = e
+        self.pair[(min(e.v, e.w), max(e.v, e.w))] = z
+
+    def __cut(self, z: int) -> None:
+        e = self.tree.pop(z)
+        del self.pair[(min(e.v, e.w), max(e.v, e.w))]
+        self.lct.cut(e.v + 1, z)
+        self.lct.cut(z, e.w + 1)
+        self.free.append(z)
+
+    def insert(self, e: Edge) -> bool:
+        """
+        插入一条边
+        :param e: 边
+        :return: 最小生成树是否改变
+        """
+        if e.v == e.w:
+            return False
+        u, v = e.v + 1, e.w + 1
+        if not self.lct.connected(u, v):
+            self.__link(e)
+            return True
+        z = self.lct.path_max(u, v)
+        if self.tree[z].weight <= e.weight:
+            return False
+        self.__cut(z)
+        self.__link(e)
+        return True
+
+    def decrease_weight(self, v: int, w: int, weight: float) -> bool:
+        """
+        减小边 v - w的权重; 非树边等同于插入一条新权重的边
+        :param v: 一个顶点
+        :param w: 另一个顶点
+        :param weight: 新的权重
+        :return: 最小生成树是否改变
+        """
+        z = self.pair.get((min(v, w), max(v, w)))
+        if z is None:
+            return self.insert(Edge(v, w, weight))
+        e = self.tree[z]
+        if weight >= e.weight:
+            return False
+        self.tree[z] = Edge(e.v, e.w, weight)
+        self.lct.set_value(z, weight)
+        return True
+
+    def edges(self) -> List[Edge]:
+        return list(self.tree.values())
+
+    def weight(self) -> float:
+        return sum(e.weight for e in self.tree.values())
+
+
+class ExternalKruskalMST:
+    def __init__(self, file_name: str, buffer_size: int = 1 << 20, tmp_dir: Optional[str] = None,
+                 fan_in: int = MERGE_FAN_IN) -> None:
+        """
+        外存 Kruskal: 边文件按 buffer_size条一块读入, 按 (权重, 较小顶点, 较大顶点) 排序后写成临时顺串,
+        再多路归并依次送入并查集, 接受 V-1条边后立即停止; 内存中的边至多约 buffer_size条
+        顺串多于 fan_in个时先逐趟把每 fan_in个顺串归并为一个中间顺串, 同时打开的文件数不超过 fan_in
+        :param file_name: 边文件(tinyEWG/tinyEWD格式)
+        :param buffer_size: 内存中缓存的边数
+        :param tmp_dir: 临时文件目录
+        :param fan_in: 每次归并的顺串数上限
+        """
+        assert fan_in >= 2
+        self.mst = []
+        with tempfile.TemporaryDirectory(dir=tmp_dir) as directory:
+            with open(file_name, 'rb') as fl:
+                v, _ = read_header(fl)
+                runs = []
+                for vs, ws, weights in edge_chunks(fl, buffer_size):
+                    records = sorted((weight, p, q) if p < q else (weight, q, p)
+                                     for p, q, weight in zip(vs, ws, weights) if p != q)
+                    runs.append(os.path.join(directory, f'{len(runs)}.run'))
+                    with open(runs[-1], 'wb') as run:
+                        run.write(b''.join(map(RUN_RECORD.pack, *zip(*records))) if records else b'')
+            depth = 0
+            while len(runs) > fan_in:
+                block = max(1, buffer_size // fan_in)
+                merged = []
+                for k in range(0, len(runs), fan_in):
+                    merged.append(os.path.join(directory, f'{depth}-{len(merged)}.merge'))
+                    self.__merge_runs(runs[k:k + fan_in], merged[-1], block)
+                runs = merged
+                depth += 1
+            uf = UF(v)
+            block = max(1, buffer_size // max(1, len(runs)))
+            for weight, p, q in heapq.merge(*(self.__read_run(run, block) for run in runs)):
+                if len(self.mst) >= v - 1:
+                    break
+                if uf.connected(p, q):
+                    continue
+                uf.union(p, q)
+                self.mst.append(Edge(p, q, weight))
+
+    @staticmethod
+    def __merge_runs(runs: List[str], file_name: str, block: int) -> None:
+        """
+        把若干顺串归并为一个中间顺串, 归并后删除输入顺串
+        :param runs: 输入顺串文件
+        :param file_name: 输出顺串文件
+        :param block: 每个顺串每次读取的记录数, 也是每次写出的记录数
+        :return:
+        """
+        records = heapq.merge(*(ExternalKruskalMST.__read_run(run, block) for run in runs))
+        with open(file_name, 'wb') as fl:
+            while True:
+                chunk = list(islice(records, block))
+                if not chunk:
+                    break
+                fl.write(b''.join(map(RUN_RECORD.pack, *zip(*chunk))))
+        for run in runs:
+            os.remove(run)
+
+    @staticmethod
+    def __read_run(file_name: str, block: int) -> Iterator[Tuple[float, int, int]]:
+        """
+        按块读取一个顺串
+        :param file_name: 顺串文件
+        :param block: 每次读取的记录数
+        :return: (权重, 顶点, 顶点) 的迭代器
+        """
+        with open(file_name, 'rb') as fl:
+            while True:
+                data = fl.read(block * RUN_RECORD.size)
+                if not data:
+                    return
+                yield from RUN_RECORD.iter_unpack(data)
+
+    def edges(self) -> List[Edge]:
+        return self.mst
+
+    def weight(self) -> float:
+        return sum(e.weight for e in self.mst)
+
+
+_worker_columns = None
+
+
+def _init_boruvka_worker(columns: Tuple[Sequence[int], Sequence[int], Sequence[float]]) -> None:
+    """
+    子进程初始化: 保存只读的边列
+    :param columns: (顶点, 顶点, 权重) 列
+    :return:
+    """
+    global _worker_columns
+    _worker_columns = columns
+
+
+def _cheapest_edges_worker(args: Tuple[Sequence[int], int, int]) -> Dict[int, int]:
+    return _cheapest_edges(_worker_columns, *args)
+
+
 if __name__ == '__main__':
-    with open('tinyEWG.txt', 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-        line = lines[0].strip().split(" ")
-        graph = EdgeWeightedGraph(int(line[0]))
-    for i in range(1, len(lines)):
-        line = lines[i].strip().split(" ")
-        graph.add_edge(Edge(int(line[0]), int(line[1]), float(line[2])))
+    from GraphIO import read_edges
+
+    graph = EdgeWeightedGraph.from_edges(*read_edges('tinyEWG.txt'))
     prim = LazyPrimMST(graph)
     print("-----PrimMST-----")
     print([str(edge) for edge in prim.edges()])
     print("---PrimWeight----")
     print(prim.weight())
+    eager = EagerPrimMST(graph)
+    print("--EagerPrimMST---")
+    print([str(edge) for edge in eager.edges()])
+    print("-EagerPrimWeight-")
+    print(eager.weight())
     kruskal = KruskalMST(graph)
     print("---KruskalMST----")
     print([str(edge) for edge in kruskal.edges()])
     print("--KruskalWeight--")
     print(kruskal.weight())
+    columns = ArrayKruskalMST(*read_edges('tinyEWG.txt'))
+    print("-ArrayKruskalMST-")
+    print([str(edge) for edge in columns.edges()])
+    print(columns.weight())
+
+    # 稠密图上的对比, 以 queue.PriorityQueue 实现的 Kruskal作为基准
+    import random
+    import time
+    from queue import PriorityQueue
+
+    def priority_queue_kruskal(g: EdgeWeightedGraph) -> float:
+        pq = PriorityQueue()
+        for e in g.edges():
+            pq.put(e)
+        uf = UF(g.V)
+        total, count = 0.0, 0
+        while not pq.empty() and count < g.V - 1:
+            e = pq.get()
+            if not uf.connected(e.v, e.w):
+                uf.union(e.v, e.w)
+                total += e.weight
+                count += 1
+        return total
+
+    rnd = random.Random(0)
+    n = 600
+    graph = EdgeWeightedGraph(n)
+    for p in range(n):
+        for q in range(p + 1, n):
+            graph.add_edge(Edge(p, q, rnd.random()))
+    start = time.perf_counter()
+    total = priority_queue_kruskal(graph)
+    print(f'PriorityQueue Kruskal: {time.perf_counter() - start:.3f}s, weight {total:.6f}')
+    for mst in (LazyPrimMST, EagerPrimMST, KruskalMST):
+        start = time.perf_counter()
+        result = mst(graph)
+        print(f'{mst.__name__}: {time.perf_counter() - start:.3f}s, weight {result.weight():.6f}')
+
+    # 列存储 Kruskal与对象 Kruskal对比
+    n, m = 200000, 1000000
+    vs, ws = array('i', [0]) * m, array('i', [0]) * m
+    weights = array('d', [0.0]) * m
+    for k in range(m):
+        vs[k], ws[k], weights[k] = rnd.randrange(n), rnd.randrange(n), rnd.random()
+    start = time.perf_counter()
+    columns = ArrayKruskalMST(n, vs, ws, weights)
+    print(f'ArrayKruskalMST: {time.perf_counter() - start:.3f}s, weight {columns.weight():.6f}')
+    graph = EdgeWeightedGraph.from_edges(n, vs, ws, weights)
+    start = time.perf_counter()
+    result = KruskalMST(graph)
+    print(f'KruskalMST: {time.perf_counter() - start:.3f}s, weight {result.weight():.6f}')
+
+    # Borůvka: 与 Kruskal结果一致, 以及多进程扩展
+    graph = EdgeWeightedGraph.from_edges(*read_edges('tinyEWG.txt'))
+    boruvka = BoruvkaMST(graph)
+    print([str(edge) for edge in boruvka.edges()], boruvka.weight())
+    n, m = 50000, 400000
+    graph = EdgeWeightedGraph(n)
+    for k in range(m):
+        graph.add_edge(Edge(rnd.randrange(n), rnd.randrange(n), round(rnd.random(), 3)))
+    kruskal = KruskalMST(graph)
+    for processes in (1, 2, 4):
+        start = time.perf_counter()
+        boruvka = BoruvkaMST(graph, processes)
+        print(f'BoruvkaMST {processes} process(es): {time.perf_counter() - start:.3f}s',
+              [str(e) for e in boruvka.edges()] == [str(e) for e in kruskal.edges()],
+              boruvka.weight() == kruskal.weight())
+
+    # 动态最小生成树: 插入边与减小边权
+    graph = EdgeWeightedGraph.from_edges(*read_edges('tinyEWG.txt'))
+    dynamic = DynamicMST(graph)
+    dynamic.insert(Edge(1, 6, 0.1))
+    dynamic.decrease_weight(4, 7, 0.2)
+    print([str(edge) for edge in dynamic.edges()], dynamic.weight())
+    n = 20000
+    graph = EdgeWeightedGraph(n)
+    for k in range(100000):
+        graph.add_edge(Edge(rnd.randrange(n), rnd.randrange(n), rnd.random()))
+    dynamic = DynamicMST(graph)
+    start = time.perf_counter()
+    for k in range(10000):
+        dynamic.insert(Edge(rnd.randrange(n), rnd.randrange(n), rnd.random()))
+    print(f'10000 insertions: {time.perf_counter() - start:.3f}s, weight {dynamic.weight():.6f}')
+
+    # 紧凑图: 内存对比, 最小生成树算法可直接运行
+    import tracemalloc
+
+    n, m = 20000, 200000
+    columns = ([rnd.randrange(n) for _ in range(m)], [rnd.randrange(n) for _ in range(m)],
+               [rnd.random() for _ in range(m)])
+    for graph_type in (EdgeWeightedGraph, CompactEdgeWeightedGraph):
+        tracemalloc.start()
+        graph = graph_type.from_edges(n, *columns)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f'{graph_type.__name__}: {memory / 2 ** 20:.1f} MiB, '
+              f'prim {LazyPrimMST(graph).weight():.6f}, kruskal {KruskalMST(graph).weight():.6f}')
+
+    # 外存 Kruskal: 小缓冲区下与 KruskalMST结果一致
+    external = ExternalKruskalMST('tinyEWG.txt', buffer_size=4)
+    print([str(edge) for edge in external.edges()], external.weight())
+    with tempfile.TemporaryDirectory() as directory:
+        name = os.path.join(directory, 'random.txt')
+        n, m = 20000, 200000
+        with open(name, 'w', encoding='utf-8') as f:
+            f.write(f'{n} {m}\n')
+            for _ in range(m):
+                f.write(f'{rnd.randrange(n)} {rnd.randrange(n)} {rnd.random():.6f}\n')
+        tracemalloc.start()
+        start = time.perf_counter()
+        external = ExternalKruskalMST(name, buffer_size=20000)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f'ExternalKruskalMST: {time.perf_counter() - start:.3f}s, peak {peak / 2 ** 20:.1f} MiB, '
+              f'weight {external.weight():.6f}')
+        kruskal = KruskalMST(EdgeWeightedGraph.from_edges(*read_edges(name, cache=False)))
+        print([str(e) for e in external.edges()] == [str(e) for e in kruskal.edges()])
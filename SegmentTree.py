@@ -10,22 +10,45 @@
 @author: airmelt
 """
 
-from typing import Callable, Any, List
+from array import array
+from bisect import bisect_left
+import math
+import operator
+from typing import Callable, Any, Iterable, List, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 结果总是取某个参数的合并函数, 可用单调栈离线处理
+SELECTIVE_MERGES = (max, min)
+# 满足幂等律 merge(x, x) == x 的合并函数, 固定右端点时不同的区间值只有 O(log V) 个
+IDEMPOTENT_MERGES = SELECTIVE_MERGES + (math.gcd, operator.and_, operator.or_)
+# 幂等合并函数对应的 numpy逐元素函数名, 稀疏表建表时整行计算
+VECTOR_MERGES = {max: 'maximum', min: 'minimum', math.gcd: 'gcd', operator.and_: 'bitwise_and',
+                 operator.or_: 'bitwise_or'}
 
 
 class SegmentTree:
-    def __init__(self, data: List[Any], merge: Callable = max) -> None:
+    def __init__(self, data: List[Any], merge: Callable = max, read_only: bool = False) -> None:
         """
         
         :param data: 初始化数据
         :param merge: 合并函数
+        :param read_only: 只读时不允许修改, 合并函数幂等(max/min/gcd等)时改用 O(1) 查询的稀疏表
         """
         self.data = data
         self.n = len(data)
-        self.tree = [None] * (self.n << 2)
         self._merge = merge
-        if self.n:
-            self._build(0, 0, self.n - 1)
+        self.read_only = read_only
+        self.sparse = SparseTable(data, merge) if read_only and merge in IDEMPOTENT_MERGES else None
+        # query_many 使用的自底向上扁平树, 修改时失效
+        self._flat = None
+        if self.sparse is None:
+            self.tree = [None] * (self.n << 2)
+            if self.n:
+                self._build(0, 0, self.n - 1)
 
     def query(self, ql: int, qr: int) -> Any:
         """
@@ -34,6 +57,8 @@ class SegmentTree:
         :param qr: 查询右区间
         :return: 返回查询的结果
         """
+        if self.sparse is not None:
+            return self.sparse.query(ql, qr)
         return self._query(0, 0, self.n - 1, ql, qr)
 
     def update(self, index: int, value: Any) -> None:
@@ -43,9 +68,119 @@ class SegmentTree:
         :param value: 修改后的值
         :return:
         """
+        if self.read_only:
+            raise ValueError('read-only SegmentTree cannot be updated')
         self.data[index] = value
+        self._flat = None
         self._update(0, 0, self.n - 1, index)
 
+    def query_many(self, lefts: Sequence[int], rights: Sequence[int]) -> Union[array, List[Any]]:
+        """
+        批量查询: 幂等的合并函数按右端点排序离线处理, 其余合并函数在自底向上的扁平树上逐个查询, 扁平树在两次修改之间复用
+        :param lefts: 查询左区间
+        :param rights: 查询右区间
+        :return: 查询结果, 数值结果以 array 返回
+        """
+        if self.sparse is not None:
+            return _compact(self.sparse.query_many(lefts, rights))
+        few = len(lefts) * self.n.bit_length() < self.n
+        if self._merge in IDEMPOTENT_MERGES and not few:
+            return _compact(self._offline_query(lefts, rights))
+        if few and (self._flat is None or self._merge in IDEMPOTENT_MERGES):
+            # 查询很少时不值得整体扫描数据或重建扁平树
+            return _compact([self.query(ql, qr) for ql, qr in zip(lefts, rights)])
+        merge, flat = self._merge, self._flat_tree()
+        size = len(flat) >> 1
+        result = []
+        for ql, qr in zip(lefts, rights):
+            left = right = None
+            lo, hi = ql + size, qr + size + 1
+            while lo < hi:
+                if lo & 1:
+                    left = flat[lo] if left is None else merge(left, flat[lo])
+                    lo += 1
+                if hi & 1:
+                    hi -= 1
+                    right = flat[hi] if right is None else merge(flat[hi], right)
+                lo >>= 1
+                hi >>= 1
+            result.append(left if right is None else right if left is None else merge(left, right))
+        return _compact(result)
+
+    def _flat_tree(self) -> List[Any]:
+        """
+        构建或复用自底向上的扁平树, 以 None 作为单位元, 不要求合并函数提供单位元
+        :return: 长度为 2 * size 的扁平树, 叶子从 size 开始
+        """
+        if self._flat is None:
+            merge = self._merge
+            size = 1 << max(0, (self.n - 1).bit_length())
+            flat = [None] * size + list(self.data) + [None] * (size - self.n)
+            for i in range(size - 1, 0, -1):
+                a, b = flat[i << 1], flat[(i << 1) | 1]
+                flat[i] = a if b is None else b if a is None else merge(a, b)
+            self._flat = flat
+        return self._flat
+
+    def _offline_query(self, lefts: Sequence[int], rights: Sequence[int]) -> List[Any]:
+        """
+        按右端点从小到大扫描数据, 维护以当前位置结尾的所有区间值
+        max/min: 单调栈, 区间 [l, r] 的结果为栈中第一个不小于 l 的下标处的值
+        其余幂等合并: 按起点从大到小记录 (区间值, 最小起点), 不同的区间值只有 O(log V) 个
+        :param lefts: 查询左区间
+        :param rights: 查询右区间
+        :return: 查询结果
+        """
+        data, merge = self.data, self._merge
+        order = sorted(range(len(lefts)), key=rights.__getitem__)
+        result = [None] * len(lefts)
+        r = -1
+        if merge in SELECTIVE_MERGES:
+            dominated = operator.le if merge is max else operator.ge
+            stack = []
+            for i in order:
+                while r < rights[i]:
+                    r += 1
+                    while stack and dominated(data[stack[-1]], data[r]):
+                        stack.pop()
+                    stack.append(r)
+                result[i] = data[stack[bisect_left(stack, lefts[i])]]
+            return result
+        values, starts = [], []
+        for i in order:
+            while r < rights[i]:
+                r += 1
+                next_values, next_starts = [data[r]], [-r]
+                for value, start in zip(values, starts):
+                    value = merge(value, data[r])
+                    if value == next_values[-1]:
+                        next_starts[-1] = start
+                    else:
+                        next_values.append(value)
+                        next_starts.append(start)
+                # starts 存负的起点, 保持升序以便二分
+                values, starts = next_values, next_starts
+            result[i] = values[bisect_left(starts, -lefts[i])]
+        return result
+
+    def update_many(self, indices: Iterable[int], values: Iterable[Any]) -> None:
+        """
+        批量单点修改, 只进入包含被修改下标的子树, 公共祖先只合并一次
+        :param indices: 需要修改的数组的下标
+        :param values: 修改后的值
+        :return:
+        """
+        if self.read_only:
+            raise ValueError('read-only SegmentTree cannot be updated')
+        touched = set()
+        for index, value in zip(indices, values):
+            self.data[index] = value
+            touched.add(index)
+        if touched:
+            self._flat = None
+            touched = sorted(touched)
+            self._update_many(0, 0, self.n - 1, touched, 0, len(touched))
+
     def _build(self, tree_index: int, left: int, right: int) -> None:
         """
         
@@ -104,6 +239,128 @@ class SegmentTree:
             self._update(left_index, left, mid, index)
         self.tree[tree_index] = self._merge(self.tree[left_index], self.tree[right_index])
 
+    def _update_many(self, tree_index: int, left: int, right: int, indices: List[int], lo: int, hi: int) -> None:
+        """
+
+        :param tree_index: 查询对应的下标
+        :param left: 有效数据数组的左边界
+        :param right: 有效数据数组的右边界
+        :param indices: 有序且去重的被修改下标
+        :param lo: 落在 [left, right] 内的被修改下标在 indices 中的起始
+        :param hi: 落在 [left, right] 内的被修改下标在 indices 中的终结(开区间)
+        :return:
+        """
+        if left == right:
+            self.tree[tree_index] = self.data[left]
+            return
+        mid = left + ((right - left) >> 1)
+        left_index, right_index = (tree_index << 1) + 1, (tree_index << 1) + 2
+        split = bisect_left(indices, mid + 1, lo, hi)
+        if lo < split:
+            self._update_many(left_index, left, mid, indices, lo, split)
+        if split < hi:
+            self._update_many(right_index, mid + 1, right, indices, split, hi)
+        self.tree[tree_index] = self._merge(self.tree[left_index], self.tree[right_index])
+
+
+def _compact(values: List[Any]) -> Union[array, List[Any]]:
+    """
+    数值结果压缩为 array: 全为整数时为 'q', 全为浮点数时为 'd', 否则原样返回
+    整数与浮点数混合时转为 'd' 会丢失大整数的精度, 因此保留列表
+    :param values: 结果列表
+    :return: array 或列表
+    """
+    if all(type(value) is int for value in values):
+        try:
+            return array('q', values)
+        except OverflowError:
+            return values
+    if all(type(value) is float for value in values):
+        return array('d', values)
+    return values
+
+
+class SparseTable:
+    def __init__(self, data: List[Any], merge: Callable = max) -> None:
+        """
+        稀疏表: table[k][i] 为 data[i: i + 2^k] 的合并结果, 建表 O(nlogn), 查询 O(1)
+        查询时两个长为 2^k 的区间会重叠, 合并函数需满足幂等律, 如 max/min/gcd
+        numpy可用且数据为数值时逐行向量化建表, 否则逐行 map
+        :param data: 初始化数据, 不可修改
+        :param merge: 合并函数
+        """
+        self.n = len(data)
+        self._merge = merge
+        self.table = [list(data)]
+        if self.__build_vectorized():
+            return
+        k = 1
+        while (1 << k) <= self.n:
+            prev, half = self.table[-1], 1 << (k - 1)
+            # 整行一次 map, 避免逐元素的 Python 循环
+            self.table.append(list(map(merge, prev[:len(prev) - half], prev[half:])))
+            k += 1
+
+    def __build_vectorized(self) -> bool:
+        """
+        numpy可用且数据全为 int64范围内的整数(或 max/min下全为浮点数)时, 每一行用一次逐元素函数计算,
+        结果存为 array('q')/array('d'), 查询时仍得到 Python 的 int/float
+        :return: 是否已建表
+        """
+        name = VECTOR_MERGES.get(self._merge)
+        if np is None or name is None or self.n < 2:
+            return False
+        data = self.table[0]
+        values = np.asarray(data)
+        if values.dtype == np.int64:
+            typecode = 'q'
+        elif (values.dtype == np.float64 and self._merge in SELECTIVE_MERGES
+              and all(type(value) is float for value in data)):
+            typecode = 'd'
+        else:
+            return False
+        ufunc = getattr(np, name)
+        k = 1
+        while (1 << k) <= self.n:
+            half = 1 << (k - 1)
+            values = ufunc(values[:len(values) - half], values[half:])
+            self.table.append(array(typecode, values.tobytes()))
+            k += 1
+        return True
+
+    def query(self, ql: int, qr: int) -> Any:
+        """
+
+        :param ql: 查询左区间
+        :param qr: 查询右区间
+        :return: 返回查询的结果
+        """
+        if ql == qr:
+            # 单个元素不做合并, 避免 gcd(x, x) == |x| 这类结果与原值不同
+            return self.table[0][ql]
+        k = (qr - ql + 1).bit_length() - 1
+        row = self.table[k]
+        return self._merge(row[ql], row[qr - (1 << k) + 1])
+
+    def query_many(self, lefts: Sequence[int], rights: Sequence[int]) -> List[Any]:
+        """
+        批量查询
+        :param lefts: 查询左区间
+        :param rights: 查询右区间
+        :return: 查询结果
+        """
+        merge, table = self._merge, self.table
+        data = table[0]
+        result = []
+        for ql, qr in zip(lefts, rights):
+            if ql == qr:
+                result.append(data[ql])
+                continue
+            k = (qr - ql + 1).bit_length() - 1
+            row = table[k]
+            result.append(merge(row[ql], row[qr - (1 << k) + 1]))
+        return result
+
 
 class STNode:
     def __init__(self, left: int, right: int, value: Any = None) -> None:
@@ -210,6 +467,9 @@ class LazySegmentTree:
             if l == i == r:
                 node.value = value
             else:
+                # 先下传懒惰标记, 否则收集时会丢失
+                if node.lazy is not None:
+                    self.__push_down(node)
                 mid = l + ((r - l) >> 1)
                 # 在左区间
                 if i <= mid:
@@ -242,6 +502,8 @@ class LazySegmentTree:
             if l == _fr and r == _to:
                 self.lazy_update(node, offset)
             else:
+                if node.lazy is not None:
+                    self.__push_down(node)
                 mid = l + ((r - l) >> 1)
                 # 在左区间
                 if _to <= mid:
@@ -254,7 +516,7 @@ class LazySegmentTree:
                     dfs(node.left, _fr, mid)
                     dfs(node.right, mid + 1, _to)
                 # 后序收集区间值
-                self.collect(node.left.value, node.right.value)
+                node.value = self.collect(node.left.value, node.right.value)
 
         dfs(self.root, fr, to)
 
@@ -284,3 +546,914 @@ class LazySegmentTree:
             self.lazy_update(node.right, node.lazy)
         # 元线段不用下传lazy标志, 当前节点的lazy标志可清零
         node.lazy = None
+
+
+class IterativeSegmentTree:
+    def __init__(self, data: List[Any], merge: Callable = max, identity: Any = float('-inf')) -> None:
+        """
+        自底向上的非递归线段树: 叶子数补齐为 2的幂, tree[size + i] 为 data[i], tree[i] 合并 tree[2i] 与 tree[2i+1]
+        :param data: 初始化数据
+        :param merge: 合并函数, 需满足结合律
+        :param identity: 合并函数的单位元, 如 max 对应 -inf, sum 对应 0
+        """
+        self.n = len(data)
+        self.size = 1
+        while self.size < self.n:
+            self.size <<= 1
+        self._merge = merge
+        self.identity = identity
+        # O(n) 原地建树
+        self.tree = [identity] * self.size + list(data) + [identity] * (self.size - self.n)
+        tree = self.tree
+        for i in range(self.size - 1, 0, -1):
+            tree[i] = merge(tree[i << 1], tree[(i << 1) | 1])
+
+    def query(self, ql: int, qr: int) -> Any:
+        """
+
+        :param ql: 查询左区间
+        :param qr: 查询右区间
+        :return: 返回查询的结果
+        """
+        merge, tree = self._merge, self.tree
+        # 左右两侧分别累积, 保证不满足交换律的合并函数顺序正确
+        left = right = self.identity
+        lo, hi = ql + self.size, qr + self.size + 1
+        while lo < hi:
+            if lo & 1:
+                left = merge(left, tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                right = merge(tree[hi], right)
+            lo >>= 1
+            hi >>= 1
+        return merge(left, right)
+
+    def update(self, index: int, value: Any) -> None:
+        """
+
+        :param index: 需要修改的数组的下标
+        :param value: 修改后的值
+        :return:
+        """
+        merge, tree = self._merge, self.tree
+        i = index + self.size
+        tree[i] = value
+        i >>= 1
+        while i:
+            value = merge(tree[i << 1], tree[(i << 1) | 1])
+            # 结点值未变化时祖先也不会变化
+            if value == tree[i]:
+                break
+            tree[i] = value
+            i >>= 1
+
+    def update_many(self, indices: Iterable[int], values: Iterable[Any]) -> None:
+        """
+        批量单点修改, 逐层只重算受影响的结点, 公共祖先只计算一次
+        :param indices: 需要修改的下标
+        :param values: 修改后的值
+        :return:
+        """
+        merge, tree = self._merge, self.tree
+        level = set()
+        for index, value in zip(indices, values):
+            i = index + self.size
+            tree[i] = value
+            level.add(i >> 1)
+        while level and 0 not in level:
+            for i in level:
+                tree[i] = merge(tree[i << 1], tree[(i << 1) | 1])
+            level = {i >> 1 for i in level}
+
+
+class LazyArraySegmentTree:
+    def __init__(self, data: List[Any], op: Callable[[Any, Any], Any], e: Any,
+                 mapping: Callable[[Any, Any], Any], composition: Callable[[Any, Any], Any], identity: Any,
+                 commutative: bool = False) -> None:
+        """
+        数组实现的通用懒标记线段树: 结点值构成幺半群 (op, e), 懒标记构成作用在结点值上的幺半群 (composition, identity)
+        叶子数补齐为 2的幂, 结点值与懒标记分别存放在两个列表中, 下传与上推均为非递归
+        结点值已包含自身的懒标记, 即 value[k] == mapping(lazy[k], op(value[2k], value[2k + 1]))
+        :param data: 初始化数据
+        :param op: 结点值的合并函数
+        :param e: op 的单位元
+        :param mapping: mapping(f, x), 把懒标记 f 作用到结点值 x 上
+        :param composition: composition(f, g), 先作用 g 再作用 f 的复合标记
+        :param identity: 恒等标记
+        :param commutative: 懒标记之间可交换(如只有区间加)时, 区间修改不必先下传标记
+        """
+        self.n = len(data)
+        self.log = max(1, (self.n - 1).bit_length())
+        self.size = 1 << self.log
+        self.op, self.e = op, e
+        self.mapping, self.composition, self.identity = mapping, composition, identity
+        self.commutative = commutative
+        self.value = [e] * self.size + list(data) + [e] * (self.size - self.n)
+        self.lazy = [identity] * self.size
+        for i in range(self.size - 1, 0, -1):
+            self.__pull(i)
+
+    def __pull(self, k: int) -> None:
+        """
+        由左右儿子重新收集结点值
+        :param k: 结点
+        :return:
+        """
+        self.value[k] = self.op(self.value[k << 1], self.value[(k << 1) | 1])
+
+    def __push_bounds(self, lo: int, hi: int) -> None:
+        """
+        自顶向下下传 [lo, hi) 两个边界路径上不被区间完全覆盖的祖先的懒标记
+        恒等标记以 is 判断并跳过, 下传在循环内展开以省去逐结点的方法调用; 边界对齐的一侧取 0号结点, 其标记恒为恒等标记
+        :param lo: 左边界(叶子编号)
+        :param hi: 右边界(叶子编号, 开区间)
+        :return:
+        """
+        value, lazy, identity = self.value, self.lazy, self.identity
+        mapping, composition, size = self.mapping, self.composition, self.size
+        # 边界末尾有 t个 0时, 第 t层及以下的祖先被区间完全覆盖
+        lo_zeros, hi_zeros = (lo & -lo).bit_length() - 1, (hi & -hi).bit_length() - 1
+        for i in range(self.log, min(lo_zeros, hi_zeros), -1):
+            for k in (lo >> i if i > lo_zeros else 0, (hi - 1) >> i if i > hi_zeros else 0):
+                f = lazy[k]
+                if f is identity:
+                    continue
+                lazy[k] = identity
+                left, right = k << 1, (k << 1) | 1
+                value[left] = mapping(f, value[left])
+                value[right] = mapping(f, value[right])
+                if left < size:
+                    lazy[left] = composition(f, lazy[left])
+                    lazy[right] = composition(f, lazy[right])
+
+    def query(self, fr: int, to: int) -> Any:
+        """
+        区间查询 | O(logN)
+        :param fr: 查询的起始, 闭区间
+        :param to: 查询的终结, 闭区间
+        :return: 区间内结点值按顺序合并的结果
+        """
+        lo, hi = fr + self.size, to + self.size + 1
+        op, value, lazy, identity, mapping = self.op, self.value, self.lazy, self.identity, self.mapping
+        # 不下传标记: 上移一层后, 左侧已收集的结点都在 lo - 1 的子树中, 右侧都在 hi 的子树中,
+        # 于是把这两个结点的懒标记直接作用到已收集的值上(标记对合并满足分配律)
+        left = right = self.e
+        has_left = has_right = False
+        length = 1
+        while lo < hi:
+            if lo & 1:
+                left = op(left, value[lo])
+                has_left = True
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                right = op(value[hi], right)
+                has_right = True
+            lo >>= 1
+            hi >>= 1
+            length <<= 1
+            if has_left and lazy[lo - 1] is not identity:
+                left = mapping(lazy[lo - 1], left)
+            if has_right and lazy[hi] is not identity:
+                right = mapping(lazy[hi], right)
+        # 区间合拢之后, 两侧各自沿祖先上移直到根
+        lo -= 1
+        while length < self.size:
+            lo >>= 1
+            hi >>= 1
+            length <<= 1
+            if has_left and lazy[lo] is not identity:
+                left = mapping(lazy[lo], left)
+            if has_right and lazy[hi] is not identity:
+                right = mapping(lazy[hi], right)
+        return op(left, right)
+
+    def update(self, i: int, value: Any) -> None:
+        """
+        单点修改: 把下标 i 的值修改为 value
+        :param i: 需要修改的下标
+        :param value: 对应的值
+        :return:
+        """
+        k = i + self.size
+        self.__push_bounds(k, k + 1)
+        self.value[k] = value
+        for j in range(1, self.log + 1):
+            self.__pull(k >> j)
+
+    def modify(self, fr: int, to: int, f: Any) -> None:
+        """
+        区间修改: 把懒标记 f 作用到区间内的每个值上 | O(logN)
+        :param fr: 区间的起始, 闭区间
+        :param to: 区间的终结, 闭区间
+        :param f: 懒标记
+        :return:
+        """
+        lo, hi = fr + self.size, to + self.size + 1
+        if not self.commutative:
+            self.__push_bounds(lo, hi)
+        value, lazy, size, identity = self.value, self.lazy, self.size, self.identity
+        mapping, composition, op = self.mapping, self.composition, self.op
+        l, r = lo, hi
+        while l < r:
+            if l & 1:
+                value[l] = mapping(f, value[l])
+                if l < size:
+                    lazy[l] = composition(f, lazy[l])
+                l += 1
+            if r & 1:
+                r -= 1
+                value[r] = mapping(f, value[r])
+                if r < size:
+                    lazy[r] = composition(f, lazy[r])
+            l >>= 1
+            r >>= 1
+        # 自底向上重新收集边界祖先, 未下传的标记重新作用到收集结果上
+        lo_zeros, hi_zeros = (lo & -lo).bit_length() - 1, (hi & -hi).bit_length() - 1
+        for i in range(min(lo_zeros, hi_zeros) + 1, self.log + 1):
+            for k in (lo >> i if i > lo_zeros else 0, (hi - 1) >> i if i > hi_zeros else 0):
+                if k:
+                    f, x = lazy[k], op(value[k << 1], value[(k << 1) | 1])
+                    value[k] = x if f is identity else mapping(f, x)
+
+
+class AffineSegmentTree:
+    def __init__(self, data: List[float], kind: str = 'sum') -> None:
+        """
+        支持区间赋值、区间加、区间乘(统一为仿射变换 x -> mul * x + add)的线段树, 查询区间和/最小值/最大值
+        与 LazyArraySegmentTree 布局相同, 懒标记拆为 mul、add 两个列表并内联计算, 避免逐结点的函数调用与元组
+        min/max 下区间乘的系数需非负
+        :param data: 初始化数据
+        :param kind: 'sum', 'min' 或 'max'
+        """
+        if kind == 'sum':
+            self.op, self.e = operator.add, 0
+        elif kind == 'min':
+            self.op, self.e = min, float('inf')
+        elif kind == 'max':
+            self.op, self.e = max, float('-inf')
+        else:
+            raise ValueError(f'unknown kind: {kind}')
+        self.kind = kind
+        self.n = len(data)
+        self.log = max(1, (self.n - 1).bit_length())
+        self.size = 1 << self.log
+        self.value = [self.e] * self.size + list(data) + [self.e] * (self.size - self.n)
+        self.muls = [1] * self.size
+        self.adds = [0] * self.size
+        op, value = self.op, self.value
+        for i in range(self.size - 1, 0, -1):
+            value[i] = op(value[i << 1], value[(i << 1) | 1])
+
+    def __push_bounds(self, lo: int, hi: int, adds_only: bool = False) -> None:
+        """
+        自顶向下下传 [lo, hi) 两个边界路径上不被区间完全覆盖的祖先的懒标记, 区间和需乘以子结点长度
+        边界对齐的一侧取 0号结点, 其标记恒为 (1, 0)
+        :param lo: 左边界(叶子编号)
+        :param hi: 右边界(叶子编号, 开区间)
+        :param adds_only: 随后只作用区间加, 加法标记之间可交换, 只需下传含乘法或赋值的标记
+        :return:
+        """
+        value, muls, adds, size = self.value, self.muls, self.adds, self.size
+        half = size >> 1
+        is_sum = self.kind == 'sum'
+        # 边界末尾有 t个 0时, 第 t层及以下的祖先被区间完全覆盖
+        lo_zeros, hi_zeros = (lo & -lo).bit_length() - 1, (hi & -hi).bit_length() - 1
+        for i in range(self.log, min(lo_zeros, hi_zeros), -1):
+            for k in (lo >> i if i > lo_zeros else 0, (hi - 1) >> i if i > hi_zeros else 0):
+                m, a = muls[k], adds[k]
+                if m == 1 and (a == 0 or adds_only):
+                    continue
+                muls[k], adds[k] = 1, 0
+                c = k << 1
+                if is_sum:
+                    length = size >> k.bit_length()
+                    value[c] = m * value[c] + a * length
+                    value[c + 1] = m * value[c + 1] + a * length
+                elif m:
+                    value[c] = m * value[c] + a
+                    value[c + 1] = m * value[c + 1] + a
+                else:
+                    value[c] = value[c + 1] = a
+                if k < half:
+                    muls[c] *= m
+                    adds[c] = m * adds[c] + a
+                    muls[c + 1] *= m
+                    adds[c + 1] = m * adds[c + 1] + a
+
+    def query(self, fr: int, to: int) -> float:
+        """
+        区间查询, 不下传标记, 与 LazyArraySegmentTree.query 相同地把祖先的标记作用到已收集的值上 | O(logN)
+        :param fr: 查询的起始, 闭区间
+        :param to: 查询的终结, 闭区间
+        :return: 区间和/最小值/最大值
+        """
+        lo, hi = fr + self.size, to + self.size + 1
+        op, value, muls, adds = self.op, self.value, self.muls, self.adds
+        is_sum = self.kind == 'sum'
+
+        def tag(k: int, x: float, count: int) -> float:
+            m, a = muls[k], adds[k]
+            if is_sum:
+                return m * x + a * count
+            return m * x + a if m else a
+
+        left = right = self.e
+        # 两侧已收集的叶子数, 区间和作用标记时需要
+        left_count = right_count = 0
+        length = 1
+        while lo < hi:
+            if lo & 1:
+                left = op(left, value[lo])
+                left_count += length
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                right = op(value[hi], right)
+                right_count += length
+            lo >>= 1
+            hi >>= 1
+            length <<= 1
+            if left_count and (muls[lo - 1] != 1 or adds[lo - 1]):
+                left = tag(lo - 1, left, left_count)
+            if right_count and (muls[hi] != 1 or adds[hi]):
+                right = tag(hi, right, right_count)
+        # 区间合拢之后, 两侧各自沿祖先上移直到根
+        lo -= 1
+        while length < self.size:
+            lo >>= 1
+            hi >>= 1
+            length <<= 1
+            if left_count and (muls[lo] != 1 or adds[lo]):
+                left = tag(lo, left, left_count)
+            if right_count and (muls[hi] != 1 or adds[hi]):
+                right = tag(hi, right, right_count)
+        return op(left, right)
+
+    def update(self, i: int, value: float) -> None:
+        """
+        单点修改: 把下标 i 的值修改为 value
+        :param i: 需要修改的下标
+        :param value: 对应的值
+        :return:
+        """
+        self.assign(i, i, value)
+
+    def modify(self, fr: int, to: int, m: float, a: float) -> None:
+        """
+        区间修改: 区间内每个值 x 变为 m * x + a | O(logN)
+        :param fr: 区间的起始, 闭区间
+        :param to: 区间的终结, 闭区间
+        :param m: 乘数
+        :param a: 加数
+        :return:
+        """
+        lo, hi = fr + self.size, to + self.size + 1
+        self.__push_bounds(lo, hi, m == 1)
+        value, muls, adds, size = self.value, self.muls, self.adds, self.size
+        is_sum = self.kind == 'sum'
+        l, r = lo, hi
+        length = 1
+        while l < r:
+            if l & 1:
+                if is_sum:
+                    value[l] = m * value[l] + a * length
+                else:
+                    value[l] = m * value[l] + a if m else a
+                if l < size:
+                    muls[l] *= m
+                    adds[l] = m * adds[l] + a
+                l += 1
+            if r & 1:
+                r -= 1
+                if is_sum:
+                    value[r] = m * value[r] + a * length
+                else:
+                    value[r] = m * value[r] + a if m else a
+                if r < size:
+                    muls[r] *= m
+                    adds[r] = m * adds[r] + a
+            l >>= 1
+            r >>= 1
+            length <<= 1
+        # 自底向上重新收集边界祖先, 未下传的加法标记重新作用到收集结果上
+        op = self.op
+        lo_zeros, hi_zeros = (lo & -lo).bit_length() - 1, (hi & -hi).bit_length() - 1
+        for i in range(min(lo_zeros, hi_zeros) + 1, self.log + 1):
+            for k in (lo >> i if i > lo_zeros else 0, (hi - 1) >> i if i > hi_zeros else 0):
+                if k:
+                    x = op(value[k << 1], value[(k << 1) | 1])
+                    a = adds[k]
+                    value[k] = x + a * (size >> (k.bit_length() - 1)) if is_sum else x + a
+
+    def assign(self, fr: int, to: int, value: float) -> None:
+        """
+        区间赋值
+        :param fr: 区间的起始, 闭区间
+        :param to: 区间的终结, 闭区间
+        :param value: 赋值
+        :return:
+        """
+        self.modify(fr, to, 0, value)
+
+    def add(self, fr: int, to: int, value: float) -> None:
+        """
+        区间加
+        :param fr: 区间的起始, 闭区间
+        :param to: 区间的终结, 闭区间
+        :param value: 加数
+        :return:
+        """
+        self.modify(fr, to, 1, value)
+
+    def multiply(self, fr: int, to: int, value: float) -> None:
+        """
+        区间乘, min/max 下需非负
+        :param fr: 区间的起始, 闭区间
+        :param to: 区间的终结, 闭区间
+        :param value: 乘数
+        :return:
+        """
+        self.modify(fr, to, value, 0)
+
+
+class DynamicSegmentTree:
+    def __init__(self, fr: int, to: int, op: Callable[[Any, Any], Any] = operator.add, e: Any = 0,
+                 default: Callable[[int, int], Any] = None, mapping: Callable[[Any, Any, int], Any] = None,
+                 composition: Callable[[Any, Any], Any] = None, capacity: int = 0) -> None:
+        """
+        动态开点线段树: 结点在第一次被访问时才创建, 未访问的区间取默认值, 适用于 10^12 以上的坐标范围
+        结点存放在 left/right/value/lazy 四个并行列表构成的结点池中, 0 号为空结点, 1 号为根
+        默认与 LazySegmentTree 相同: 区间和, modify 为区间加
+        :param fr: 整个区间的起始, 闭区间
+        :param to: 整个区间的终结, 闭区间
+        :param op: 结点值的合并函数
+        :param e: op 的单位元
+        :param default: default(l, r), 未访问区间 [l, r] 的值, 默认为 e
+        :param mapping: mapping(f, x, length), 把懒标记 f 作用到长度为 length 的区间值 x 上
+        :param composition: composition(f, g), 先作用 g 再作用 f 的复合标记
+        :param capacity: 预分配的结点数
+        """
+        assert fr <= to
+        self.fr, self.to = fr, to
+        self.op, self.e = op, e
+        self.default = (lambda l, r: e) if default is None else default
+        self.mapping = _range_add if mapping is None else mapping
+        self.composition = operator.add if composition is None else composition
+        self.left, self.right = [0] * (capacity + 2), [0] * (capacity + 2)
+        self.value, self.lazy = [e] * (capacity + 2), [None] * (capacity + 2)
+        self.clear()
+
+    def clear(self) -> None:
+        """
+        清空为初始状态, 保留结点池的存储以便复用
+        :return:
+        """
+        self.count = 1
+        self.root = self.__new_node(self.fr, self.to)
+
+    def __len__(self) -> int:
+        return self.count - 1
+
+    def __new_node(self, l: int, r: int) -> int:
+        """
+        从结点池分配结点, 池满时扩容
+        :param l: 左边界
+        :param r: 右边界
+        :return: 结点编号
+        """
+        k = self.count
+        self.count += 1
+        if k < len(self.value):
+            self.left[k] = self.right[k] = 0
+            self.value[k], self.lazy[k] = self.default(l, r), None
+        else:
+            self.left.append(0)
+            self.right.append(0)
+            self.value.append(self.default(l, r))
+            self.lazy.append(None)
+        return k
+
+    def __apply(self, k: int, l: int, r: int, f: Any) -> None:
+        """
+        把懒标记 f 作用到结点 k 上, 非叶子结点与已有标记复合
+        :param k: 结点
+        :param l: 左边界
+        :param r: 右边界
+        :param f: 懒标记
+        :return:
+        """
+        self.value[k] = self.mapping(f, self.value[k], r - l + 1)
+        if l != r:
+            g = self.lazy[k]
+            self.lazy[k] = f if g is None else self.composition(f, g)
+
+    def __push_down(self, k: int, l: int, r: int) -> int:
+        """
+        创建缺失的子结点并下传懒标记
+        :param k: 结点
+        :param l: 左边界
+        :param r: 右边界
+        :return: 区间中点
+        """
+        mid = l + ((r - l) >> 1)
+        if not self.left[k]:
+            self.left[k] = self.__new_node(l, mid)
+            self.right[k] = self.__new_node(mid + 1, r)
+        f = self.lazy[k]
+        if f is not None:
+            self.__apply(self.left[k], l, mid, f)
+            self.__apply(self.right[k], mid + 1, r, f)
+            self.lazy[k] = None
+        return mid
+
+    def query(self, fr: int, to: int) -> Any:
+        """
+        区间查询 | O(logN), 不创建结点
+        :param fr: 查询的起始, 闭区间
+        :param to: 查询的终结, 闭区间
+        :return: 区间值
+        """
+        assert self.fr <= fr <= to <= self.to
+        return self.__query(self.root, self.fr, self.to, fr, to)
+
+    def __query(self, k: int, l: int, r: int, fr: int, to: int) -> Any:
+        """
+
+        :param k: 结点
+        :param l: 结点的左边界
+        :param r: 结点的右边界
+        :param fr: 查询的起始, 闭区间
+        :param to: 查询的终结, 闭区间
+        :return: 区间值
+        """
+        if l == fr and r == to:
+            return self.value[k]
+        if not self.left[k]:
+            # 未展开的结点: 子区间为默认值再作用本结点的懒标记
+            f, value = self.lazy[k], self.default(fr, to)
+            return value if f is None else self.mapping(f, value, to - fr + 1)
+        mid = self.__push_down(k, l, r)
+        if to <= mid:
+            return self.__query(self.left[k], l, mid, fr, to)
+        elif fr > mid:
+            return self.__query(self.right[k], mid + 1, r, fr, to)
+        return self.op(self.__query(self.left[k], l, mid, fr, mid),
+                       self.__query(self.right[k], mid + 1, r, mid + 1, to))
+
+    def update(self, i: int, value: Any) -> None:
+        """
+        单点修改: 把下标 i 的值修改为 value
+        :param i: 需要修改的下标
+        :param value: 对应的值
+        :return:
+        """
+        assert self.fr <= i <= self.to
+        path = []
+        k, l, r = self.root, self.fr, self.to
+        while l != r:
+            path.append(k)
+            mid = self.__push_down(k, l, r)
+            if i <= mid:
+                k, r = self.left[k], mid
+            else:
+                k, l = self.right[k], mid + 1
+        self.value[k] = value
+        self.__pull(path)
+
+    def modify(self, fr: int, to: int, f: Any) -> None:
+        """
+        区间修改: 把懒标记 f 作用到区间内的每个值上, 默认为区间加 | O(logN)
+        :param fr: 区间的起始, 闭区间
+        :param to: 区间的终结, 闭区间
+        :param f: 懒标记
+        :return:
+        """
+        assert self.fr <= fr <= to <= self.to
+        self.__modify(self.root, self.fr, self.to, fr, to, f)
+
+    def __modify(self, k: int, l: int, r: int, fr: int, to: int, f: Any) -> None:
+        """
+
+        :param k: 结点
+        :param l: 结点的左边界
+        :param r: 结点的右边界
+        :param fr: 区间的起始, 闭区间
+        :param to: 区间的终结, 闭区间
+        :param f: 懒标记
+        :return:
+        """
+        if l == fr and r == to:
+            self.__apply(k, l, r, f)
+            return
+        mid = self.__push_down(k, l, r)
+        if to <= mid:
+            self.__modify(self.left[k], l, mid, fr, to, f)
+        elif fr > mid:
+            self.__modify(self.right[k], mid + 1, r, fr, to, f)
+        else:
+            self.__modify(self.left[k], l, mid, fr, mid, f)
+            self.__modify(self.right[k], mid + 1, r, mid + 1, to, f)
+        self.value[k] = self.op(self.value[self.left[k]], self.value[self.right[k]])
+
+    def __pull(self, path: List[int]) -> None:
+        """
+        自底向上重新合并路径上的结点
+        :param path: 自根向下的结点序列
+        :return:
+        """
+        value, left, right, op = self.value, self.left, self.right, self.op
+        for k in reversed(path):
+            value[k] = op(value[left[k]], value[right[k]])
+
+
+def _range_add(f: Any, x: Any, length: int) -> Any:
+    """
+    DynamicSegmentTree 默认的 mapping: 区间和上的区间加
+    :param f: 每个元素增加的值
+    :param x: 区间和
+    :param length: 区间长度
+    :return: 增加后的区间和
+    """
+    return x + f * length
+
+
+class PersistentSegmentTree:
+    def __init__(self, data: List[Any], merge: Callable = operator.add) -> None:
+        """
+        可持久化线段树: 每次修改只复制根到叶子路径上的 O(logN) 个结点, 其余结点与旧版本共享
+        所有版本的结点存放在同一个结点池(left/right/value 三个并行数组)中, roots[v] 为版本 v 的根
+        :param data: 初始化数据, 构成版本 0
+        :param merge: 合并函数
+        """
+        assert data
+        self.n = len(data)
+        self._merge = merge
+        self.left, self.right, self.value = array('i'), array('i'), []
+        self.roots = [self.__build(data, 0, self.n - 1)]
+
+    def __new_node(self, left: int, right: int, value: Any) -> int:
+        self.left.append(left)
+        self.right.append(right)
+        self.value.append(value)
+        return len(self.value) - 1
+
+    def __build(self, data: List[Any], left: int, right: int) -> int:
+        if left == right:
+            return self.__new_node(-1, -1, data[left])
+        mid = left + ((right - left) >> 1)
+        left_node, right_node = self.__build(data, left, mid), self.__build(data, mid + 1, right)
+        return self.__new_node(left_node, right_node, self._merge(self.value[left_node], self.value[right_node]))
+
+    def __len__(self) -> int:
+        return len(self.roots)
+
+    def update(self, index: int, value: Any, version: int = -1) -> int:
+        """
+        在指定版本上单点修改, 生成新版本, 旧版本不变
+        :param index: 需要修改的数组的下标
+        :param value: 修改后的值
+        :param version: 基于的版本, 默认为最新版本
+        :return: 新版本号
+        """
+        node, left, right = self.roots[version], 0, self.n - 1
+        path = []
+        while left != right:
+            mid = left + ((right - left) >> 1)
+            if index <= mid:
+                path.append((node, False))
+                node, right = self.left[node], mid
+            else:
+                path.append((node, True))
+                node, left = self.right[node], mid + 1
+        # 自底向上复制路径
+        node = self.__new_node(-1, -1, value)
+        for parent, is_right in reversed(path):
+            if is_right:
+                left_node, right_node = self.left[parent], node
+            else:
+                left_node, right_node = node, self.right[parent]
+            node = self.__new_node(left_node, right_node, self._merge(self.value[left_node], self.value[right_node]))
+        self.roots.append(node)
+        return len(self.roots) - 1
+
+    def get(self, index: int, version: int = -1) -> Any:
+        """
+
+        :param index: 数组的下标
+        :param version: 版本号, 默认为最新版本
+        :return: 该版本中下标 index 的值
+        """
+        node, left, right = self.roots[version], 0, self.n - 1
+        while left != right:
+            mid = left + ((right - left) >> 1)
+            if index <= mid:
+                node, right = self.left[node], mid
+            else:
+                node, left = self.right[node], mid + 1
+        return self.value[node]
+
+    def query(self, ql: int, qr: int, version: int = -1) -> Any:
+        """
+
+        :param ql: 查询左区间
+        :param qr: 查询右区间
+        :param version: 版本号, 默认为最新版本
+        :return: 该版本中 [ql, qr] 的查询结果
+        """
+        return self._query(self.roots[version], 0, self.n - 1, ql, qr)
+
+    def _query(self, node: int, left: int, right: int, ql: int, qr: int) -> Any:
+        if left == ql and right == qr:
+            return self.value[node]
+        mid = left + ((right - left) >> 1)
+        if qr <= mid:
+            return self._query(self.left[node], left, mid, ql, qr)
+        elif ql > mid:
+            return self._query(self.right[node], mid + 1, right, ql, qr)
+        return self._merge(self._query(self.left[node], left, mid, ql, mid),
+                           self._query(self.right[node], mid + 1, right, mid + 1, qr))
+
+    def kth(self, k: int, version: int = -1, base: int = None) -> int:
+        """
+        计数树(值为个数, merge 为加法)上的第 k 小: 以两版本计数之差为准, 自根向下二分
+        :param k: 从 1 开始的名次
+        :param version: 版本号
+        :param base: 被减去的版本号, 默认不减
+        :return: 第 k 个计数所在的下标
+        """
+        node, left, right = self.roots[version], 0, self.n - 1
+        other = self.roots[base] if base is not None else -1
+        assert 1 <= k <= self.value[node] - (self.value[other] if other != -1 else 0)
+        while left != right:
+            mid = left + ((right - left) >> 1)
+            count = self.value[self.left[node]] - (self.value[self.left[other]] if other != -1 else 0)
+            if k <= count:
+                node, right = self.left[node], mid
+                other = self.left[other] if other != -1 else -1
+            else:
+                k -= count
+                node, left = self.right[node], mid + 1
+                other = self.right[other] if other != -1 else -1
+        return left
+
+
+class RangeKthSmallest:
+    def __init__(self, data: List[Any]) -> None:
+        """
+        静态区间第 k 小: 对值离散化后依次插入可持久化计数树, 版本 i 为前 i 个元素的计数
+        :param data: 初始化数据
+        """
+        self.sorted_values = sorted(set(data))
+        rank = {value: i for i, value in enumerate(self.sorted_values)}
+        self.tree = PersistentSegmentTree([0] * len(self.sorted_values))
+        for value in data:
+            i = rank[value]
+            self.tree.update(i, self.tree.get(i) + 1)
+
+    def query(self, ql: int, qr: int, k: int) -> Any:
+        """
+
+        :param ql: 查询左区间
+        :param qr: 查询右区间
+        :param k: 从 1 开始的名次
+        :return: data[ql: qr + 1] 中第 k 小的值
+        """
+        return self.sorted_values[self.tree.kth(k, qr + 1, ql)]
+
+
+if __name__ == '__main__':
+    import random
+    import time
+    import tracemalloc
+
+    rnd = random.Random(0)
+    values = [rnd.randrange(10 ** 9) for _ in range(200000)]
+    queries = [sorted((rnd.randrange(len(values)), rnd.randrange(len(values)))) for _ in range(100000)]
+    updates = [(rnd.randrange(len(values)), rnd.randrange(10 ** 9)) for _ in range(100000)]
+    for tree_type in (SegmentTree, IterativeSegmentTree):
+        start = time.perf_counter()
+        tree = tree_type(list(values))
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        result = [tree.query(ql, qr) for ql, qr in queries]
+        query = time.perf_counter() - start
+        start = time.perf_counter()
+        for index, value in updates:
+            tree.update(index, value)
+        update = time.perf_counter() - start
+        print(f'{tree_type.__name__}: build {build:.3f}s, query {query:.3f}s, update {update:.3f}s, '
+              f'checksum {sum(result) % 997}, {tree.query(0, len(values) - 1)}')
+    tree = IterativeSegmentTree(list(values), lambda a, b: a + b, 0)
+    start = time.perf_counter()
+    tree.update_many(*zip(*updates))
+    print(f'update_many: {time.perf_counter() - start:.3f}s, {tree.query(0, len(values) - 1)}')
+
+    # 批量查询与批量修改: max 走离线单调栈, 求和走扁平树
+    lefts, rights = map(list, zip(*queries))
+    for merge in (max, math.gcd, operator.add):
+        tree = SegmentTree(list(values), merge)
+        start = time.perf_counter()
+        result = [tree.query(ql, qr) for ql, qr in queries]
+        single = time.perf_counter() - start
+        start = time.perf_counter()
+        batch = tree.query_many(lefts, rights)
+        print(f'SegmentTree({merge.__name__}): query {single:.3f}s, query_many {time.perf_counter() - start:.3f}s',
+              list(batch) == result)
+    start = time.perf_counter()
+    tree.update_many(*zip(*updates))
+    print(f'SegmentTree.update_many: {time.perf_counter() - start:.3f}s, {tree.query(0, len(values) - 1)}')
+
+    # 只读且合并函数幂等时自动使用稀疏表
+    for name, build_tree in (('SegmentTree', SegmentTree), ('IterativeSegmentTree', IterativeSegmentTree),
+                             ('SegmentTree(read_only=True)', lambda data: SegmentTree(data, read_only=True))):
+        start = time.perf_counter()
+        tree = build_tree(list(values))
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        result = [tree.query(ql, qr) for ql, qr in queries]
+        elapsed = time.perf_counter() - start
+        print(f'{name}: build {build:.3f}s, {len(queries) / elapsed:,.0f} queries/s, '
+              f'checksum {sum(result) % 997}')
+
+    # 懒标记线段树: 数组实现与 STNode实现的区间加、区间和对比
+    n = 100000
+    operations = [sorted((rnd.randrange(n), rnd.randrange(n))) + [rnd.randrange(100)] for _ in range(50000)]
+    start = time.perf_counter()
+    pointer_tree = LazySegmentTree(0, n - 1, lambda i: values[i], lambda a, b: a + b)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    result = []
+    for fr, to, offset in operations:
+        pointer_tree.modify(fr, to, offset)
+        result.append(pointer_tree.query(to >> 1, to))
+    print(f'LazySegmentTree: build {build:.3f}s, modify + query {time.perf_counter() - start:.3f}s')
+    start = time.perf_counter()
+    generic_tree = LazyArraySegmentTree([(x, 1) for x in values[:n]], lambda a, b: (a[0] + b[0], a[1] + b[1]), (0, 0),
+                                        lambda f, x: (x[0] + f * x[1], x[1]), operator.add, 0, commutative=True)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = []
+    for fr, to, offset in operations:
+        generic_tree.modify(fr, to, offset)
+        expected.append(generic_tree.query(to >> 1, to)[0])
+    print(f'LazyArraySegmentTree: build {build:.3f}s, modify + query {time.perf_counter() - start:.3f}s',
+          result == expected)
+    start = time.perf_counter()
+    array_tree = AffineSegmentTree(values[:n])
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = []
+    for fr, to, offset in operations:
+        array_tree.add(fr, to, offset)
+        expected.append(array_tree.query(to >> 1, to))
+    print(f'AffineSegmentTree: build {build:.3f}s, modify + query {time.perf_counter() - start:.3f}s',
+          result == expected)
+    array_tree = AffineSegmentTree(values[:n], 'max')
+    array_tree.multiply(0, n - 1, 2)
+    array_tree.assign(10, 20, -1)
+    print(array_tree.query(0, n - 1) == 2 * max(values[:n]), array_tree.query(10, 20))
+    for build in (lambda: LazySegmentTree(0, n - 1, lambda i: values[i], lambda a, b: a + b),
+                  lambda: AffineSegmentTree(values[:n])):
+        tracemalloc.start()
+        tree = build()
+        print(f'{type(tree).__name__}: {tracemalloc.get_traced_memory()[0] / 2 ** 20:.1f}MiB')
+        del tree
+        tracemalloc.stop()
+
+    # 动态开点线段树: 10^12 范围内的区间加、区间和, 结点池复用
+    dynamic_tree = DynamicSegmentTree(0, 10 ** 12, capacity=1 << 21)
+    operations = [sorted((rnd.randrange(10 ** 12), rnd.randrange(10 ** 12))) + [rnd.randrange(100)]
+                  for _ in range(20000)]
+    for _ in range(2):
+        dynamic_tree.clear()
+        start = time.perf_counter()
+        checksum = 0
+        for fr, to, offset in operations:
+            dynamic_tree.modify(fr, to, offset)
+            checksum += dynamic_tree.query(to >> 1, to)
+        print(f'DynamicSegmentTree: {time.perf_counter() - start:.3f}s, {len(dynamic_tree)} nodes, checksum {checksum}')
+    dynamic_tree = DynamicSegmentTree(0, 10 ** 12, min, float('inf'), default=lambda l, r: 0,
+                                      mapping=lambda f, x, length: x + f)
+    dynamic_tree.modify(10 ** 6, 10 ** 9, 5)
+    dynamic_tree.update(10 ** 7, -3)
+    print(dynamic_tree.query(10 ** 6, 10 ** 9), dynamic_tree.query(10 ** 6, 10 ** 6 + 5), dynamic_tree.query(0, 10 ** 12))
+
+    # 可持久化线段树: 每个版本的求和与区间第 k 小
+    n = 100000
+    persistent = PersistentSegmentTree(values[:n])
+    nodes = len(persistent.value)
+    start = time.perf_counter()
+    for index, value in updates:
+        persistent.update(index % n, value)
+    print(f'PersistentSegmentTree: {len(updates)} updates {time.perf_counter() - start:.3f}s, '
+          f'{(len(persistent.value) - nodes) / len(updates):.1f} nodes per update')
+    print(persistent.query(0, n - 1, 0) == sum(values[:n]), persistent.get(updates[0][0] % n, 1) == updates[0][1])
+    kth_tree = RangeKthSmallest(values[:n])
+    checks = [(ql % n, qr % n) for ql, qr in queries[:1000] if ql % n <= qr % n]
+    start = time.perf_counter()
+    result = [kth_tree.query(ql, qr, (qr - ql) // 2 + 1) for ql, qr in checks]
+    print(f'RangeKthSmallest: {len(checks)} queries {time.perf_counter() - start:.3f}s',
+          result[:20] == [sorted(values[ql: qr + 1])[(qr - ql) // 2] for ql, qr in checks[:20]])
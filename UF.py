@@ -12,6 +12,20 @@
 
 __author__ = 'Air'
 
+from array import array
+from collections import defaultdict
+from itertools import islice
+from multiprocessing import Pool
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 批量操作的规模不小于该值且不小于节点数的 1/8时, 若可用 numpy则走向量化路径
+VECTOR_MIN = 1 << 12
+
 
 class UF:
     def __init__(self, n: int) -> None:
@@ -57,3 +71,457 @@ class UF:
             self.parent[p] = self.parent[self.parent[p]]
             p = self.parent[p]
         return p
+
+    def labels(self) -> List[int]:
+        """
+        每个节点的分量编号, 编号按分量中最小节点的先后从 0开始, 与合并顺序无关
+        :return: 分量编号列表
+        """
+        label = {}
+        return [label.setdefault(self.find(p), len(label)) for p in range(len(self.parent))]
+
+
+class ArrayUF:
+    def __init__(self, n: int) -> None:
+        """
+        数组实现的并查集: 按秩合并 + 路径减半, 提供批量操作以减少方法调用开销
+        :param n: 节点数
+        """
+        self.parent = array('i', range(n))
+        self.rank = array('b', [0]) * n
+        self.count = n
+
+    def find(self, p: int) -> int:
+        """
+        查找根节点, 并进行路径减半
+        :param p: 一个节点
+        :return: 根节点
+        """
+        parent = self.parent
+        while parent[p] != p:
+            parent[p] = parent[parent[p]]
+            p = parent[p]
+        return p
+
+    def union(self, p: int, q: int) -> None:
+        """
+        连接两个点
+        :param p: 一个节点
+        :param q: 另一个节点
+        :return:
+        """
+        self.union_many((p,), (q,))
+
+    def connected(self, p: int, q: int) -> bool:
+        """
+        检查两个点是否在同一分量
+        :param p: 一个节点
+        :param q: 另一个节点
+        :return: 返回两个点是否在同一个分量
+        """
+        return self.find(p) == self.find(q)
+
+    def _vectorized(self, xs: Iterable[int]) -> bool:
+        """
+        是否对批量操作使用 numpy: 需要已知长度且规模足够大, 否则逐个处理的开销更小
+        :param xs: 节点序列
+        :return:
+        """
+        return np is not None and hasattr(xs, '__len__') and len(xs) >= max(VECTOR_MIN, len(self.parent) >> 3)
+
+    def _compress(self) -> 'np.ndarray':
+        """
+        指针跳跃: 反复令 parent = parent[parent], 直到每个节点直接指向根
+        :return: 与 self.parent 共享内存的 numpy视图
+        """
+        parent = np.frombuffer(self.parent, dtype=np.intc)
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                return parent
+            parent[:] = grand
+
+    def union_many(self, ps: Iterable[int], qs: Iterable[int]) -> None:
+        """
+        批量连接 ps[i] 与 qs[i]
+        向量化路径按轮进行: 压缩后取两端的根, 每个较大的根挂到它所有候选中最小的根下(np.minimum.at),
+        仍跨分量的边留到下一轮; 星形等输入两轮即可完成, 但轮数没有 O(logN)的保证,
+        超过 2 * log2(N)轮后剩余的边回落到逐个合并
+        向量化路径不维护秩, 之后的逐个合并仍然正确, 只是秩不再是树高的上界
+        :param ps: 节点序列
+        :param qs: 节点序列
+        :return:
+        """
+        if self._vectorized(ps):
+            ps, qs = np.asarray(ps, dtype=np.intc), np.asarray(qs, dtype=np.intc)
+            for _ in range(2 * len(self.parent).bit_length()):
+                parent = self._compress()
+                rp, rq = parent[ps], parent[qs]
+                mask = rp != rq
+                ps, qs = ps[mask], qs[mask]
+                if not len(ps):
+                    break
+                # 同一个根的多次写入取最小值, 所有候选在同一轮中归并到一起
+                np.minimum.at(parent, np.maximum(rp[mask], rq[mask]), np.minimum(rp[mask], rq[mask]))
+            parent = np.frombuffer(self.parent, dtype=np.intc)
+            self.count = int(np.count_nonzero(parent == np.arange(len(parent), dtype=np.intc)))
+            if not len(ps):
+                return
+            ps, qs = ps.tolist(), qs.tolist()
+        parent, rank = self.parent, self.rank
+        count = self.count
+        for p, q in zip(ps, qs):
+            while parent[p] != p:
+                parent[p] = parent[parent[p]]
+                p = parent[p]
+            while parent[q] != q:
+                parent[q] = parent[parent[q]]
+                q = parent[q]
+            if p == q:
+                continue
+            if rank[p] < rank[q]:
+                p, q = q, p
+            parent[q] = p
+            if rank[p] == rank[q]:
+                rank[p] += 1
+            count -= 1
+        self.count = count
+
+    def find_many(self, xs: Iterable[int]) -> array:
+        """
+        批量查找根节点
+        :param xs: 节点序列
+        :return: 根节点数组
+        """
+        if self._vectorized(xs):
+            return array('i', self._compress()[np.asarray(xs, dtype=np.intc)].tobytes())
+        parent = self.parent
+        result = array('i')
+        append = result.append
+        for p in xs:
+            while parent[p] != p:
+                parent[p] = parent[parent[p]]
+                p = parent[p]
+            append(p)
+        return result
+
+    def connected_many(self, ps: Iterable[int], qs: Iterable[int]) -> array:
+        """
+        批量检查 ps[i] 与 qs[i] 是否在同一分量
+        :param ps: 节点序列
+        :param qs: 节点序列
+        :return: 0/1 数组
+        """
+        if self._vectorized(ps):
+            parent = self._compress()
+            ps, qs = np.asarray(ps, dtype=np.intc), np.asarray(qs, dtype=np.intc)
+            return array('b', (parent[ps] == parent[qs]).astype(np.int8).tobytes())
+        return array('b', map(int.__eq__, self.find_many(ps), self.find_many(qs)))
+
+    def labels(self) -> array:
+        """
+        一次遍历给出每个节点的分量编号, 编号按分量中最小节点的先后从 0开始
+        :return: 分量编号数组
+        """
+        if self._vectorized(self.parent):
+            # 根按首次出现的位置排序即为分量编号
+            _, first, inverse = np.unique(self._compress(), return_index=True, return_inverse=True)
+            rank = np.empty(len(first), dtype=np.intc)
+            rank[np.argsort(first)] = np.arange(len(first), dtype=np.intc)
+            return array('i', rank[inverse].tobytes())
+        parent = self.parent
+        n = len(parent)
+        result = array('i', [-1]) * n
+        # 根节点 -> 分量编号
+        label = array('i', [-1]) * n
+        count = 0
+        for i in range(n):
+            p = i
+            while parent[p] != p:
+                parent[p] = parent[parent[p]]
+                p = parent[p]
+            if label[p] == -1:
+                label[p] = count
+                count += 1
+            result[i] = label[p]
+        return result
+
+
+class RollbackUF:
+    def __init__(self, n: int) -> None:
+        """
+        可撤销的并查集: 按大小合并, 不做路径压缩, 每次合并压入撤销栈
+        :param n: 节点数
+        """
+        self.parent = list(range(n))
+        self.weight = [1] * n
+        self.count = n
+        # 每次成功合并时被挂到另一棵树下的根
+        self.history = []
+
+    def find(self, p: int) -> int:
+        """
+        查找根节点, 树高为 O(logN)
+        :param p: 一个节点
+        :return: 根节点
+        """
+        while self.parent[p] != p:
+            p = self.parent[p]
+        return p
+
+    def union(self, p: int, q: int) -> bool:
+        """
+        连接两个点
+        :param p: 一个节点
+        :param q: 另一个节点
+        :return: 是否发生了合并
+        """
+        p = self.find(p)
+        q = self.find(q)
+        if p == q:
+            return False
+        if self.weight[p] < self.weight[q]:
+            p, q = q, p
+        self.parent[q] = p
+        self.weight[p] += self.weight[q]
+        self.history.append(q)
+        self.count -= 1
+        return True
+
+    def connected(self, p: int, q: int) -> bool:
+        return self.find(p) == self.find(q)
+
+    def snapshot(self) -> int:
+        """
+        记录当前状态
+        :return: 快照, 即撤销栈的长度
+        """
+        return len(self.history)
+
+    def rollback(self, snapshot: int) -> None:
+        """
+        撤销到快照时的状态
+        :param snapshot: 快照
+        :return:
+        """
+        while len(self.history) > snapshot:
+            q = self.history.pop()
+            p = self.parent[q]
+            self.weight[p] -= self.weight[q]
+            self.parent[q] = q
+            self.count += 1
+
+
+def offline_connectivity(n: int, operations: Sequence[Tuple[str, int, int]]) -> List[bool]:
+    """
+    离线动态连通性: 操作为 ('add', u, v), ('remove', u, v) 或 ('query', u, v)
+    每条边的存活时间区间挂到时间轴线段树的 O(logT)个结点上, 深度优先遍历线段树, 进入结点时合并其上的边,
+    离开时撤销, 到达叶子时回答该时刻的查询; 总复杂度 O((E + Q) logT logN)
+    :param n: 节点数
+    :param operations: 按时间排列的操作
+    :return: 每个查询的结果
+    :raises ValueError: 删除了当前不存在的边
+    """
+    t = len(operations)
+    if not t:
+        return []
+    # 边 -> 尚未删除的加入时刻(允许重边)
+    alive = defaultdict(list)
+    intervals = []
+    for i, (op, u, v) in enumerate(operations):
+        key = (min(u, v), max(u, v))
+        if op == 'add':
+            alive[key].append(i)
+        elif op == 'remove':
+            if not alive[key]:
+                raise ValueError(f'operation {i}: cannot remove edge ({u}, {v}), it is not present')
+            intervals.append((alive[key].pop(), i, key))
+    for key, starts in alive.items():
+        for start in starts:
+            intervals.append((start, t, key))
+    size = 1
+    while size < t:
+        size <<= 1
+    nodes = [[] for _ in range(size << 1)]
+    for lo, hi, key in intervals:
+        # 自底向上把 [lo, hi) 拆分到线段树结点上
+        lo += size
+        hi += size
+        while lo < hi:
+            if lo & 1:
+                nodes[lo].append(key)
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                nodes[hi].append(key)
+            lo >>= 1
+            hi >>= 1
+    uf = RollbackUF(n)
+    answers = []
+
+    def dfs(node: int) -> None:
+        snapshot = uf.snapshot()
+        for u, v in nodes[node]:
+            uf.union(u, v)
+        if node >= size:
+            i = node - size
+            if i < t and operations[i][0] == 'query':
+                answers.append(uf.connected(operations[i][1], operations[i][2]))
+        else:
+            dfs(node << 1)
+            # 右子树最左侧的叶子已超出操作范围时不再深入
+            right = (node << 1) + 1
+            if right << (size.bit_length() - right.bit_length()) < size + t:
+                dfs(right)
+        uf.rollback(snapshot)
+
+    dfs(1)
+    return answers
+
+
+def sharded_components(n: int, ps: Iterable[int], qs: Iterable[int], processes: Optional[int] = None,
+                       chunk_size: int = 1 << 20) -> Tuple[int, array]:
+    """
+    多进程求连通分量: 边流按 chunk_size切成分片, 各子进程在分片上建立本地并查集,
+    只返回分片内被触及节点到其根的生成森林边, 主进程把这些边合并到全局并查集
+    :param n: 节点数
+    :param ps: 边的一端
+    :param qs: 边的另一端
+    :param processes: 进程数, 为 1时在当前进程中计算, 默认为 CPU核数
+    :param chunk_size: 每个分片的边数
+    :return: (分量数, 与 UF.labels 相同的分量编号)
+    """
+    def shards() -> Iterator[Tuple[array, array]]:
+        p_iter, q_iter = iter(ps), iter(qs)
+        while True:
+            p_chunk = array('i', islice(p_iter, chunk_size))
+            if not p_chunk:
+                return
+            yield p_chunk, array('i', islice(q_iter, len(p_chunk)))
+
+    uf = ArrayUF(n)
+    if processes == 1:
+        for shard in shards():
+            uf.union_many(*_shard_forest(shard))
+    else:
+        with Pool(processes) as pool:
+            for nodes, roots in pool.imap_unordered(_shard_forest, shards()):
+                uf.union_many(nodes, roots)
+    return uf.count, uf.labels()
+
+
+def _shard_forest(shard: Tuple[array, array]) -> Tuple[array, array]:
+    """
+    在一个分片上建立本地并查集, 只为分片触及的节点重新编号, 时间与内存与分片大小成正比
+    :param shard: (边的一端, 边的另一端)
+    :return: (非根节点, 对应的根), 合并后的连通性与分片相同
+    """
+    ps, qs = shard
+    if np is not None:
+        # 排序去重一次完成重新编号, inverse 即为每个端点的本地编号
+        nodes, local = np.unique(np.concatenate((np.asarray(ps, dtype=np.intc), np.asarray(qs, dtype=np.intc))),
+                                 return_inverse=True)
+        local = local.astype(np.intc)
+        uf = ArrayUF(len(nodes))
+        uf.union_many(array('i', local[:len(ps)].tobytes()), array('i', local[len(ps):].tobytes()))
+        roots = np.asarray(uf.find_many(range(len(nodes))), dtype=np.intc)
+        mask = roots != np.arange(len(nodes), dtype=np.intc)
+        return array('i', nodes[mask].tobytes()), array('i', nodes[roots[mask]].tobytes())
+    nodes = array('i', set(ps).union(qs))
+    # 全局节点 -> 本地编号
+    index = dict(zip(nodes, range(len(nodes))))
+    uf = ArrayUF(len(nodes))
+    uf.union_many(array('i', map(index.__getitem__, ps)), array('i', map(index.__getitem__, qs)))
+    roots = uf.find_many(range(len(nodes)))
+    forest = [(nodes[i], nodes[r]) for i, r in enumerate(roots) if i != r]
+    return array('i', (p for p, _ in forest)), array('i', (r for _, r in forest))
+
+
+if __name__ == '__main__':
+    import random
+    import time
+
+    uf = ArrayUF(10)
+    uf.union_many([4, 3, 6, 9, 2, 8, 5, 7, 6, 1], [3, 8, 5, 4, 1, 9, 0, 2, 1, 0])
+    print(uf.count, list(uf.labels()), list(uf.connected_many([0, 4], [7, 7])))
+
+    # 逐对调用与批量调用对比
+    rnd = random.Random(0)
+    n, m = 1000000, 2000000
+    ps = array('i', (rnd.randrange(n) for _ in range(m)))
+    qs = array('i', (rnd.randrange(n) for _ in range(m)))
+    start = time.perf_counter()
+    uf = UF(n)
+    for p, q in zip(ps, qs):
+        uf.union(p, q)
+    print(f'UF: {time.perf_counter() - start:.3f}s, count {uf.count}')
+    start = time.perf_counter()
+    array_uf = ArrayUF(n)
+    array_uf.union_many(ps, qs)
+    print(f'ArrayUF.union_many ({"numpy" if np is not None else "python"}): {time.perf_counter() - start:.3f}s, '
+          f'count {array_uf.count}')
+    start = time.perf_counter()
+    labels = array_uf.labels()
+    print(f'ArrayUF.labels: {time.perf_counter() - start:.3f}s, components {max(labels) + 1}')
+
+    # 星形输入: 中心编号最大, 所有叶子在同一轮中挂到中心的根下
+    hub = array('i', [n - 1]) * (n - 1)
+    leaves = array('i', range(n - 1))
+    start = time.perf_counter()
+    uf = UF(n)
+    for p, q in zip(leaves, hub):
+        uf.union(p, q)
+    print(f'UF star: {time.perf_counter() - start:.3f}s, count {uf.count}')
+    start = time.perf_counter()
+    array_uf = ArrayUF(n)
+    array_uf.union_many(leaves, hub)
+    print(f'ArrayUF.union_many star: {time.perf_counter() - start:.3f}s, count {array_uf.count}')
+
+    # 离线动态连通性与逐个查询重放对比
+    n, t = 2000, 20000
+    operations, edges = [], []
+    for _ in range(t):
+        r = rnd.random()
+        if r < 0.4 or not edges:
+            edges.append((rnd.randrange(n), rnd.randrange(n)))
+            operations.append(('add',) + edges[-1])
+        elif r < 0.6:
+            operations.append(('remove',) + edges.pop(rnd.randrange(len(edges))))
+        else:
+            operations.append(('query', rnd.randrange(n), rnd.randrange(n)))
+    start = time.perf_counter()
+    answers = offline_connectivity(n, operations)
+    print(f'offline_connectivity: {time.perf_counter() - start:.3f}s, {sum(answers)} / {len(answers)} connected')
+    start = time.perf_counter()
+    expected, current = [], []
+    for op, u, v in operations[:t // 10]:
+        if op == 'add':
+            current.append((u, v))
+        elif op == 'remove':
+            current.remove((u, v))
+        else:
+            uf = UF(n)
+            for p, q in current:
+                uf.union(p, q)
+            expected.append(uf.connected(u, v))
+    print(f'replay of first {t // 10} operations: {time.perf_counter() - start:.3f}s', expected == answers[:len(expected)])
+
+    # 分片多进程连通分量, 与单个 UF结果一致
+    n, m = 200000, 1000000
+    ps = array('i', (rnd.randrange(n) for _ in range(m)))
+    qs = array('i', (rnd.randrange(n) for _ in range(m)))
+    start = time.perf_counter()
+    uf = UF(n)
+    for p, q in zip(ps, qs):
+        uf.union(p, q)
+    expected = uf.labels()
+    print(f'UF: {time.perf_counter() - start:.3f}s, count {uf.count}')
+    for processes in (1, 2, 4):
+        start = time.perf_counter()
+        count, labels = sharded_components(n, ps, qs, processes, chunk_size=m // 4)
+        print(f'sharded_components {processes} process(es): {time.perf_counter() - start:.3f}s, count {count}',
+              list(labels) == expected)
+    # 星形输入: 主进程合并的生成森林也是星形
+    start = time.perf_counter()
+    count, _ = sharded_components(n, range(n - 1), array('i', [n - 1]) * (n - 1), 1)
+    print(f'sharded_components star: {time.perf_counter() - start:.3f}s, count {count}')